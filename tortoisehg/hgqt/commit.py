@@ -607,7 +607,7 @@ class CommitWidget(QWidget, qtlib.TaskWidget):
             self.stwidget.defcheck = 'commit'
         self.stwidget.fileview.enableChangeSelection(allowcs)
         if not allowcs:
-            self.stwidget.partials = {}
+            self.stwidget.partials.clear()
         if refreshwctx:
             self.stwidget.refreshWctx()
         custom = self.wdirinfo.custom.copy()
@@ -1231,7 +1231,7 @@ class CommitWidget(QWidget, qtlib.TaskWidget):
         self.stopAction.setEnabled(False)
         self.commitButtonEnable.emit(True)
         if ret == 0:
-            self.stwidget.partials = {}
+            self.stwidget.partials.clear()
             if self.currentAction == 'rollback':
                 shlib.shell_notify([self.repo.root])
                 return
@@ -15,6 +15,7 @@ from typing import (
     Iterable,
     List,
     Optional,
+    Tuple,
     Type,
     TypeVar,
     Union,
@@ -61,10 +62,11 @@ def _dumpChild(xw, parent: RepoTreeItem) -> None:
         c.dumpObject(xw)
 
 def undumpObject(xr) -> RepoTreeItem:
-    xmltagname = str(xr.name())
-    obj = _xmlUndumpMap[xmltagname](xr)
-    assert obj.xmltagname == xmltagname, (obj.xmltagname, xmltagname)
-    return obj
+    xmltagname = xr.name()
+    if not isinstance(xmltagname, str):
+        # QStringRef/QStringView on some Qt bindings
+        xmltagname = str(xmltagname)
+    return _xmlUndumpMap[xmltagname](xr)
 
 def _undumpChild(xr, parent: RepoTreeItem, undump=undumpObject) -> None:
     while not xr.atEnd():
@@ -121,15 +123,22 @@ def _buildquotenamemap(
 def itempath(item: RepoTreeItem) -> str:
     """Virtual path to the given item"""
     rnames = []
-    while item.parent():
-        namemap = _buildquotenamemap(item.parent().childs)
+    parent = item.parent()
+    while parent:
         q = _quotename(item.shortname())
-        i = namemap[q].index(item)
+        # count preceding siblings sharing the same name; usually none
+        i = 0
+        for c in parent.childs:
+            if c is item:
+                break
+            if _quotename(c.shortname()) == q:
+                i += 1
         if i == 0:
             rnames.append(q)
         else:
             rnames.append('%s#%d' % (q, i))
-        item = item.parent()
+        item = parent
+        parent = item.parent()
     return '/'.join(reversed(rnames))
 
 def findbyitempath(root: RepoTreeItem, path: str) -> RepoTreeItem:
@@ -204,11 +213,13 @@ class RepoTreeItem:
         child._row = len(self.childs)
         child._parent = self
         self.childs.append(child)
+        child._invalidateCommonPath()
 
     def insertChild(self, row: int, child: RepoTreeItem) -> None:
         child._row = row
         child._parent = self
         self.childs.insert(row, child)
+        child._invalidateCommonPath()
 
     def child(self, row: int) -> RepoTreeItem:
         return self.childs[row]
@@ -218,12 +229,13 @@ class RepoTreeItem:
 
     def childRoots(self) -> List[str]:
         roots = []
-        if isinstance(self, RepoItem):
-            roots.append(self.rootpath())
-        for child in self.childs:
-            roots.extend(child.childRoots())
+        self._collectRoots(roots)
         return roots
 
+    def _collectRoots(self, roots: List[str]) -> None:
+        for child in self.childs:
+            child._collectRoots(roots)
+
     def columnCount(self) -> int:
         return 2
 
@@ -253,6 +265,7 @@ class RepoTreeItem:
         for c in remove:
             c._row = 0
             c._parent = None
+            c._invalidateCommonPath()
         for i, c in enumerate(keep):
             c._row = i
         return True
@@ -292,10 +305,22 @@ class RepoTreeItem:
     def getCommonPath(self) -> str:
         return ''
 
+    def _invalidateCommonPath(self) -> None:
+        for c in self.childs:
+            c._invalidateCommonPath()
+
+
+# (baseiconname, valid, shared) -> composite icon, shared by all RepoItems
+_repoIconCache: Dict[Tuple[str, bool, bool], QIcon] = {}
 
 class RepoItem(RepoTreeItem):
     xmltagname = 'repo'
 
+    _flags = (Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+              | Qt.ItemFlag.ItemIsDragEnabled | Qt.ItemFlag.ItemIsEditable)
+    _menubase = ('open', 'clone', 'addsubrepo', None, 'explore',
+                 'terminal', 'copypath', None, 'rename', 'remove')
+
     def __init__(
         self,
         root: str,
@@ -306,15 +331,28 @@ class RepoItem(RepoTreeItem):
     ) -> None:
         RepoTreeItem.__init__(self, parent)
         self._root = root
+        self._rootbytes = hglib.fromunicode(root)
         self._shortname: str = shortname if shortname is not None else ''
         self._basenode: bytes = basenode if basenode is not None else node.nullid
         # expensive check is done at appendSubrepos()
         self._sharedpath: str = sharedpath if sharedpath is not None else ''
         self._valid = True
+        # snapshot of getCommonPath(), reset when the group path changes
+        self._commonpathcache: Optional[str] = None
+        # root is never changed, so prepare the forms used by shortpath()
+        self._normroot = os.path.normpath(root)
+        if os.name == 'nt':
+            self._normrootkey = self._normroot.lower()
+        else:
+            self._normrootkey = self._normroot
 
     def isRepo(self) -> bool:
         return True
 
+    def _collectRoots(self, roots: List[str]) -> None:
+        roots.append(self._root)
+        super()._collectRoots(roots)
+
     def rootpath(self) -> str:
         return self._root
 
@@ -342,13 +380,19 @@ class RepoItem(RepoTreeItem):
     def data(self, column: int, role: Qt.ItemDataRole):
         if role == Qt.ItemDataRole.DecorationRole and column == 0:
             baseiconname = 'hg'
-            if paths.is_unc_path(hglib.fromunicode(self.rootpath())):
+            if paths.is_unc_path(self._rootbytes):
                 baseiconname = 'thg-remote-repo'
+            key = (baseiconname, self._valid, bool(self._sharedpath))
+            try:
+                return _repoIconCache[key]
+            except KeyError:
+                pass
             ico = qtlib.geticon(baseiconname)
             if not self._valid:
                 ico = qtlib.getoverlaidicon(ico, qtlib.geticon('dialog-warning'))
             elif self._sharedpath:
                 ico = qtlib.getoverlaidicon(ico, qtlib.geticon('hg-sharedrepo'))
+            _repoIconCache[key] = ico
             return ico
         elif role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
             return [self.shortname, self.shortpath][column]()
@@ -356,36 +400,38 @@ class RepoItem(RepoTreeItem):
     def getCommonPath(self) -> str:
         return self.parent().getCommonPath()
 
-    def shortpath(self) -> str:
-        try:
-            cpath = self.getCommonPath()
-        except:
-            cpath = ''
-        spath2 = spath = os.path.normpath(self._root)
+    def _invalidateCommonPath(self) -> None:
+        self._commonpathcache = None
+        super()._invalidateCommonPath()
 
-        if os.name == 'nt':
-            spath2 = spath2.lower()
+    def shortpath(self) -> str:
+        cpath = self._commonpathcache
+        if cpath is None:
+            try:
+                cpath = self.getCommonPath()
+            except:
+                cpath = ''
+            self._commonpathcache = cpath
+        spath = self._normroot
 
-        if cpath and spath2.startswith(cpath):
+        if cpath and self._normrootkey.startswith(cpath):
             iShortPathStart = len(cpath)
             spath = spath[iShortPathStart:]
-            if spath and spath[0] in '/\\':
+            if spath.startswith(('/', '\\')):
                 # do not show a slash at the beginning of the short path
                 spath = spath[1:]
 
         return spath
 
     def menulist(self):
-        acts = ['open', 'clone', 'addsubrepo', None, 'explore',
-                'terminal', 'copypath', None, 'rename', 'remove']
+        acts = list(self._menubase)
         if self.childCount() > 0:
             acts.extend([None, 'openAll', (_('&Sort'), ['sortbyname', 'sortbyhgsub'])])
         acts.extend([None, 'settings'])
         return acts
 
     def flags(self):
-        return (Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsDragEnabled
-            | Qt.ItemFlag.ItemIsEditable)
+        return self._flags
 
     def dump(self, xw) -> None:
         xw.writeAttribute('root', self._root)
@@ -421,13 +467,13 @@ class RepoItem(RepoTreeItem):
             if repo is None:
                 if not os.path.exists(self._root):
                     self._valid = False
-                    return [hglib.fromunicode(self._root)]
+                    return [self._rootbytes]
                 elif (not os.path.exists(os.path.join(self._root, '.hgsub'))
                       and not os.path.exists(
                           os.path.join(self._root, '.hg', 'sharedpath'))):
                     return []  # skip repo creation, which is expensive
                 repo = hg.repository(hglib.loadui(),
-                                     hglib.fromunicode(self._root))
+                                     self._rootbytes)
             if repo.sharedpath != repo.path:
                 self._sharedpath = hglib.tounicode(repo.sharedpath)
             wctx = repo[b'.']
@@ -435,10 +481,14 @@ class RepoItem(RepoTreeItem):
             for subpath in sorted(wctx.substate, key=sortkey):
                 sri = None
                 abssubpath = repo.wjoin(subpath)
-                subtype = pycompat.sysstr(wctx.substate[subpath][2])
+                subtype = wctx.substate[subpath][2]
                 sriIsValid = os.path.isdir(abssubpath)
-                sri = _newSubrepoItem(hglib.tounicode(abssubpath),
-                                      repotype=subtype)
+                newitem = _subrepoFactoryMap.get(subtype)
+                if newitem is None:
+                    sri = _newSubrepoItem(hglib.tounicode(abssubpath),
+                                          repotype=pycompat.sysstr(subtype))
+                else:
+                    sri = newitem(hglib.tounicode(abssubpath))
                 sri._valid = sriIsValid
                 self.appendChild(sri)
 
@@ -448,7 +498,7 @@ class RepoItem(RepoTreeItem):
                     invalidRepoList.append(repo.wjoin(subpath))
                     return invalidRepoList
 
-                if subtype == 'hg':
+                if subtype == b'hg':
                     # Only recurse into mercurial subrepos
                     sctx = wctx.sub(subpath)
                     invalidSubrepoList = sri.appendSubrepos(sctx._repo)
@@ -463,7 +513,7 @@ class RepoItem(RepoTreeItem):
             if sri:
                 sri._valid = False
                 invalidRepoList.append(abssubpath)
-            invalidRepoList.append(hglib.fromunicode(self._root))
+            invalidRepoList.append(self._rootbytes)
         except Exception as e:
             # If any other sort of exception happens, show the corresponding
             # error message, but do not crash!
@@ -472,7 +522,7 @@ class RepoItem(RepoTreeItem):
             if sri:
                 sri._valid = False
                 invalidRepoList.append(abssubpath)
-            invalidRepoList.append(hglib.fromunicode(self._root))
+            invalidRepoList.append(self._rootbytes)
 
             # Show a warning message indicating that there was an error
             if repo:
@@ -495,7 +545,7 @@ class RepoItem(RepoTreeItem):
     def setData(self, column: int, value) -> bool:
         if column == 0:
             shortname = hglib.fromunicode(value)
-            abshgrcpath = os.path.join(hglib.fromunicode(self.rootpath()),
+            abshgrcpath = os.path.join(self._rootbytes,
                                        b'.hg', b'hgrc')
             if not hgrcutil.setConfigValue(abshgrcpath, b'web.name', shortname):
                 qtlib.WarningMsgBox(_('Unable to update repository name'),
@@ -513,7 +563,14 @@ _subrepoType2IcoMap = {
     'svn': 'thg-svn-subrepo',
     }
 
+_subrepoIconCache: Dict[Tuple[str, bool], QIcon] = {}
+
 def _newSubrepoIcon(repotype: str, valid: bool = True) -> QIcon:
+    key = (repotype, valid)
+    try:
+        return _subrepoIconCache[key]
+    except KeyError:
+        pass
     subiconame = _subrepoType2IcoMap.get(repotype)
     if subiconame is None:
         ico = qtlib.geticon('thg-subrepo')
@@ -522,6 +579,7 @@ def _newSubrepoIcon(repotype: str, valid: bool = True) -> QIcon:
         ico = qtlib.getoverlaidicon(ico, qtlib.geticon('thg-subrepo'))
     if not valid:
         ico = qtlib.getoverlaidicon(ico, qtlib.geticon('dialog-warning'))
+    _subrepoIconCache[key] = ico
     return ico
 
 class StandaloneSubrepoItem(RepoItem):
@@ -538,31 +596,27 @@ class SubrepoItem(RepoItem):
     """Actual Mercurial subrepo"""
     xmltagname = 'subrepo'
 
+    _flags = (Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+              | Qt.ItemFlag.ItemIsDragEnabled)
+    _menubase = ('open', 'clone', None, 'addsubrepo', 'removesubrepo',
+                 None, 'explore', 'terminal', 'copypath')
+
     def data(self, column: int, role: Qt.ItemDataRole):
         if role == Qt.ItemDataRole.DecorationRole and column == 0:
             return _newSubrepoIcon('hg', valid=self._valid)
         else:
             return super().data(column, role)
 
-    def menulist(self):
-        acts = ['open', 'clone', None, 'addsubrepo', 'removesubrepo',
-                None, 'explore', 'terminal', 'copypath']
-        if self.childCount() > 0:
-            acts.extend([None, 'openAll', (_('&Sort'), ['sortbyname', 'sortbyhgsub'])])
-        acts.extend([None, 'settings'])
-        return acts
-
     def getSupportedDragDropActions(self):
         return Qt.DropAction.CopyAction
 
-    def flags(self):
-        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsDragEnabled
-
 # possibly this should not be a RepoItem because it lacks common functions
 class AlienSubrepoItem(RepoItem):
     """Actual non-Mercurial subrepo"""
     xmltagname = 'subrepo'
 
+    _flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
     def __init__(
         self, root: str, repotype: str, parent: Optional[RepoTreeItem] = None
     ) -> None:
@@ -578,9 +632,6 @@ class AlienSubrepoItem(RepoItem):
     def menulist(self):
         return ['explore', 'terminal', 'copypath']
 
-    def flags(self):
-        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
-
     def repotype(self) -> str:
         return self._repotype
 
@@ -610,6 +661,13 @@ def _newSubrepoItem(
     else:
         return AlienSubrepoItem(root, repotype=repotype)
 
+# substate type (bytes) -> item constructor, for the known subrepo types
+_subrepoFactoryMap = {
+    b'hg': SubrepoItem,
+    b'git': lambda root: AlienSubrepoItem(root, repotype='git'),
+    b'svn': lambda root: AlienSubrepoItem(root, repotype='svn'),
+    }
+
 def _undumpSubrepoItem(xr) -> RepoItem:
     a = xr.attributes()
     repotype = str(a.value('', 'repotype')) or 'hg'
@@ -621,6 +679,10 @@ def _undumpSubrepoItem(xr) -> RepoItem:
 class RepoGroupItem(RepoTreeItem):
     xmltagname = 'group'
 
+    _flags = (Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+              | Qt.ItemFlag.ItemIsDropEnabled | Qt.ItemFlag.ItemIsDragEnabled
+              | Qt.ItemFlag.ItemIsEditable)
+
     def __init__(
         self, name: str, parent: Optional[RepoTreeItem] = None
     ) -> None:
@@ -659,8 +721,7 @@ class RepoGroupItem(RepoTreeItem):
             'reloadRegistry']
 
     def flags(self):
-        return (Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsDropEnabled
-            | Qt.ItemFlag.ItemIsDragEnabled | Qt.ItemFlag.ItemIsEditable)
+        return self._flags
 
     def dump(self, xw) -> None:
         xw.writeAttribute('name', self.name)
@@ -693,10 +754,24 @@ class RepoGroupItem(RepoTreeItem):
             # If a group has no repo items, the common path is empty
             self._commonpath = ''
         else:
-            childs = [os.path.normcase(child.rootpath())
-                      for child in self.childs
-                      if not isinstance(child, RepoGroupItem)]
-            self._commonpath = os.path.dirname(os.path.commonprefix(childs))
+            # running common prefix of the repo paths; stops early once empty
+            prefix = None
+            for child in self.childs:
+                if isinstance(child, RepoGroupItem):
+                    continue
+                p = os.path.normcase(child.rootpath())
+                if prefix is None:
+                    prefix = p
+                    continue
+                n = min(len(prefix), len(p))
+                i = 0
+                while i < n and prefix[i] == p[i]:
+                    i += 1
+                prefix = prefix[:i]
+                if not prefix:
+                    break
+            self._commonpath = os.path.dirname(prefix or '')
+        self._invalidateCommonPath()
 
     def getCommonPath(self) -> str:
         return self._commonpath
@@ -721,3 +796,7 @@ _xmlUndumpMap = {
     'subrepo': StandaloneSubrepoItem.undump,
     'treeitem': RepoTreeItem.undump,
     }
+
+# every undump function must produce an object of the matching tag, which
+# is checked once here instead of per parsed element
+assert all(f.__self__.xmltagname == t for t, f in _xmlUndumpMap.items())
@@ -7,11 +7,13 @@
 
 from __future__ import annotations
 
+import functools
 import os
 import tempfile
 import typing
 
 from .qtcore import (
+    QTimer,
     Qt,
     pyqtSlot,
 )
@@ -23,7 +25,6 @@ from .qtgui import (
 from mercurial import (
     error,
     pycompat,
-    util,
 )
 
 from ..util import (
@@ -33,15 +34,12 @@ from ..util import (
 )
 from ..util.i18n import _
 from . import (
-    cmdcore,
-    cmdui,
     qtlib,
 )
-from .serve_ui import Ui_ServeDialog
-from .webconf import WebconfForm
 
 if typing.TYPE_CHECKING:
     from typing import (
+        Dict,
         List,
         Text,
         Tuple,
@@ -69,47 +67,97 @@ class ServeDialog(QDialog):
                             & ~Qt.WindowType.WindowContextHelpButtonHint)
         self.setWindowIcon(qtlib.geticon('hg-serve'))
 
+        from .serve_ui import Ui_ServeDialog
         self._qui = Ui_ServeDialog()
         self._qui.setupUi(self)
 
+        # status text while running; port cannot be changed until stopped
+        self._runningmsg: Optional[str] = None
+        # last state applied by _updateform()
+        self._laststarted: Optional[bool] = None
+        # (path,) once _singlerepo is resolved for the current webconf
+        self._singlerepocache: Optional[Tuple[Optional[str]]] = None
+        # webconf files written for the server, removed once it's stopped
+        self._tempwebconfs: List[bytes] = []
+
         self._initwebconf(webconf)
         self._initcmd(ui)
         self._initactions()
         self._updateform()
 
     def _initcmd(self, ui: uimod.ui) -> None:
+        from . import cmdcore, cmdui
         # TODO: forget old logs?
         self._log_edit = cmdui.LogWidget(self)
         self._qui.details_tabs.addTab(self._log_edit, _('Log'))
+        # access log can be busy; append it in batches
+        self._pendinglog: List[Tuple[str, str]] = []
+        self._logtimer = QTimer(self, interval=16, singleShot=True)
+        self._logtimer.timeout.connect(self._flushlog)
         # as of hg 3.0, hgweb does not cooperate with command-server channel
         self._agent = cmdcore.CmdAgent(ui, self, worker='proc')
-        self._agent.outputReceived.connect(self._log_edit.appendLog)
+        self._agent.outputReceived.connect(self._queuelog)
         self._agent.busyChanged.connect(self._updateform)
 
+    @pyqtSlot(str, str)
+    def _queuelog(self, msg: str, label: str) -> None:
+        self._pendinglog.append((msg, label))
+        if not self._logtimer.isActive():
+            self._logtimer.start()
+
+    @pyqtSlot()
+    def _flushlog(self) -> None:
+        pending = self._pendinglog
+        self._pendinglog = []
+        # merge consecutive chunks of the same label into one append
+        i = 0
+        while i < len(pending):
+            label = pending[i][1]
+            j = i + 1
+            while j < len(pending) and pending[j][1] == label:
+                j += 1
+            self._log_edit.appendLog(''.join(m for m, _l in pending[i:j]),
+                                     label)
+            i = j
+
     def _initwebconf(self, webconf: Optional[IniConfig]) -> None:
+        from .webconf import WebconfForm
         self._webconf_form = WebconfForm(webconf=webconf, parent=self)
+        self._webconf_form.webconfChanged.connect(self._invalidatesinglerepo)
         self._qui.details_tabs.addTab(self._webconf_form, _('Repositories'))
 
     def _initactions(self) -> None:
         self._qui.start_button.clicked.connect(self.start)
         self._qui.stop_button.clicked.connect(self.stop)
+        self._qui.settings_button.clicked.connect(self._editsettings)
 
     @pyqtSlot()
     def _updateform(self) -> None:
         """update form availability and status text"""
         self._updatestatus()
-        self._qui.start_button.setEnabled(not self.isstarted())
-        self._qui.stop_button.setEnabled(self.isstarted())
-        self._qui.settings_button.setEnabled(not self.isstarted())
-        self._qui.port_edit.setEnabled(not self.isstarted())
-        self._webconf_form.setEnabled(not self.isstarted())
+        started = self.isstarted()
+        if started == self._laststarted:
+            return
+        self._laststarted = started
+        self.setUpdatesEnabled(False)
+        try:
+            self._qui.start_button.setEnabled(not started)
+            self._qui.stop_button.setEnabled(started)
+            self._qui.settings_button.setEnabled(not started)
+            self._qui.port_edit.setEnabled(not started)
+            self._webconf_form.setEnabled(not started)
+        finally:
+            self.setUpdatesEnabled(True)
 
     def _updatestatus(self) -> None:
         if self.isstarted():
-            # TODO: escape special chars
-            link = '<a href="%s">%s</a>' % (self.rooturl, self.rooturl)
-            msg = _('Running at %s') % link
+            if self._runningmsg is None:
+                url = qtlib.htmlescape(self.rooturl)
+                link = '<a href="%s">%s</a>' % (url, url)
+                self._runningmsg = _('Running at %s') % link
+            msg = self._runningmsg
         else:
+            self._runningmsg = None
             msg = _('Stopped')
 
         self._qui.status_edit.setText(msg)
@@ -125,8 +173,9 @@ class ServeDialog(QDialog):
     def _cmdargs(self) -> List[str]:
         """Build command args to run server"""
         a = ['serve', '--port', str(self.port), '-v']
-        if self._singlerepo:
-            a += ['-R', self._singlerepo]
+        singlerepo = self._singlerepo
+        if singlerepo:
+            a += ['-R', singlerepo]
         else:
             a += ['--web-conf', self._tempwebconf()]
         return a
@@ -139,14 +188,26 @@ class ServeDialog(QDialog):
 
         assert isinstance(webconf, wconfig._wconfig)  # help pytype
 
+        buf = pycompat.io.StringIO()
+        webconf.write(buf)
+        data = hglib.fromunicode(buf.getvalue())
+        self._cleanuptempfiles()  # the previous server must have stopped
         fd, fname = tempfile.mkstemp(prefix=b'webconf_',
                                      dir=qtlib.gettempdir())
-        f = os.fdopen(fd, 'w')
+        self._tempwebconfs.append(fname)
         try:
-            webconf.write(f)
-            return hglib.tounicode(fname)
+            os.write(fd, data)
         finally:
-            f.close()
+            os.close(fd)
+        return hglib.tounicode(fname)
+
+    def _cleanuptempfiles(self) -> None:
+        for fname in self._tempwebconfs:
+            try:
+                os.unlink(fname)
+            except OSError:
+                pass
+        del self._tempwebconfs[:]
 
     @property
     def _webconf(self) -> IniConfig:
@@ -159,12 +220,22 @@ class ServeDialog(QDialog):
         # TODO: The caller crashes if this returns None with:
         #    `'ServeDialog' object has no attribute '_singlerepo'`
         # NOTE: we cannot use web-conf to serve single repository at '/' path
-        if len(self._webconf[b'paths']) != 1:
+        if self._singlerepocache is None:
+            self._singlerepocache = (self._findsinglerepo(),)
+        return self._singlerepocache[0]
+
+    def _findsinglerepo(self) -> Optional[str]:
+        webconf = self._webconf
+        if len(webconf[b'paths']) != 1:
             return
-        path = self._webconf.get(b'paths', b'/')
+        path = webconf.get(b'paths', b'/')
         if path and b'*' not in path:  # exactly a single repo (no wildcard)
             return hglib.tounicode(path)
 
+    @pyqtSlot()
+    def _invalidatesinglerepo(self) -> None:
+        self._singlerepocache = None
+
     @pyqtSlot()
     def stop(self) -> None:
         """Stop web server"""
@@ -172,6 +243,7 @@ class ServeDialog(QDialog):
 
     def reject(self) -> None:
         self.stop()
+        self._cleanuptempfiles()
         super().reject()
 
     def isstarted(self) -> bool:
@@ -187,13 +259,15 @@ class ServeDialog(QDialog):
     @property
     def port(self) -> int:
         """Port number of the web server"""
-        return int(self._qui.port_edit.value())
+        return self._qui.port_edit.value()  # QSpinBox value is an int
 
     def setport(self, port: int) -> None:
         self._qui.port_edit.setValue(port)
 
     def keyPressEvent(self, event):
-        if self.isstarted() and event.key() == Qt.Key.Key_Escape:
+        # only Escape that no child widget (popup, editor) consumed gets
+        # here; it stops the running server instead of rejecting the dialog
+        if event.key() == Qt.Key.Key_Escape and self.isstarted():
             self.stop()
             return
 
@@ -205,10 +279,13 @@ class ServeDialog(QDialog):
             event.ignore()
             return
 
+        self._cleanuptempfiles()
         return super().closeEvent(event)
 
-    @util.propertycache
-    def _trayicon(self):
+    @functools.cached_property
+    def _trayicon(self) -> Optional[QSystemTrayIcon]:
+        if not QSystemTrayIcon.isSystemTrayAvailable():
+            return None
         icon = QSystemTrayIcon(self.windowIcon(), parent=self)
         icon.activated.connect(self._restorefromtray)
         icon.setToolTip(self.windowTitle())
@@ -219,22 +296,31 @@ class ServeDialog(QDialog):
 
     @pyqtSlot()
     def _minimizetotray(self):
-        self._trayicon.show()
-        self._trayicon.showMessage(_('TortoiseHg Web Server'),
-                                   _('Running at %s') % self.rooturl)
+        trayicon = self._trayicon
+        if trayicon is None:
+            # nowhere to restore from if hidden
+            self.showMinimized()
+            return
+        trayicon.show()
+        trayicon.showMessage(_('TortoiseHg Web Server'),
+                             _('Running at %s') % self.rooturl)
         self.hide()
 
     @pyqtSlot()
     def _restorefromtray(self):
-        self._trayicon.hide()
+        if self._trayicon is not None:
+            self._trayicon.hide()
         self.show()
 
     @pyqtSlot()
-    def on_settings_button_clicked(self):
+    def _editsettings(self):
         from tortoisehg.hgqt import settings
         settings.SettingsDialog(parent=self, focus='web.name').exec()
 
 
+# ASCII whitespace as per bytes.isspace(), plus the list separator
+_configlistspecialchars = b' \t\n\r\x0b\x0c,'
+
 def _asconfigliststr(value: bytes) -> bytes:
     r"""
     >>> _asconfigliststr(b'foo')
@@ -247,23 +333,71 @@ def _asconfigliststr(value: bytes) -> bytes:
     b'"foo \\"bar\\""'
     """
     # ui.configlist() uses isspace(), which is locale-dependent
-    if any(c.isspace() or c == b',' for c in pycompat.iterbytestr(value)):
-        return b'"' + value.replace(b'"', b'\\"') + b'"'
+    if len(value.translate(None, _configlistspecialchars)) != len(value):
+        if b'"' in value:
+            value = value.replace(b'"', b'\\"')
+        return b'"%s"' % value
     else:
         return value
 
-def _readconfig(ui: uimod.ui,
-                repopath: Optional[bytes],
-                webconfpath: Optional[bytes]) -> Tuple[uimod.ui, Optional[IniConfig]]:
-    """Create new ui and webconf object and read appropriate files"""
+# (abspath, mtime_ns, size) -> parsed webconf, kept pristine and copied out
+_webconfcache: Dict[Tuple[bytes, int, int], IniConfig] = {}
+_WEBCONFCACHE_MAX = 8
+
+def _readwebconf(webconfpath: bytes) -> IniConfig:
+    """Read webconf file, reusing the parsed object if file is unchanged"""
+    abspath = os.path.abspath(webconfpath)
+    try:
+        st = os.stat(abspath)
+    except OSError:
+        key = None
+    else:
+        key = (abspath, st.st_mtime_ns, st.st_size)
+        cached = _webconfcache.get(key)
+        if cached is not None:
+            c = cached.copy()
+            c.path = abspath
+            return c
+    # TODO: handle file not found
+    c = wconfig.readfile(webconfpath)
+    if key is not None:
+        if len(_webconfcache) >= _WEBCONFCACHE_MAX:
+            del _webconfcache[next(iter(_webconfcache))]
+        _webconfcache[key] = c.copy()
+    c.path = abspath
+    return c
+
+def _configport(ui: uimod.ui) -> Optional[int]:
+    """Port number configured in web.port, or None if not a number"""
+    try:
+        return int(ui.config(b'web', b'port'))
+    except (TypeError, ValueError):
+        return None
+
+def _readconfig(
+    ui: uimod.ui,
+    repopath: Optional[bytes],
+    webconfpath: Optional[bytes],
+) -> Tuple[uimod.ui, Optional[IniConfig], Optional[int]]:
+    """Create new ui and webconf object and read appropriate files
+
+    The port number is resolved from the resulting ui while it is at hand.
+    """
+    lui, c = _readconfigfiles(ui, repopath, webconfpath)
+    return lui, c, _configport(lui)
+
+def _readconfigfiles(
+    ui: uimod.ui,
+    repopath: Optional[bytes],
+    webconfpath: Optional[bytes],
+) -> Tuple[uimod.ui, Optional[IniConfig]]:
+    if not webconfpath and not repopath:
+        return ui, None  # nothing to read, no need to copy
     lui = ui.copy()
     if webconfpath:
         lui.readconfig(webconfpath)
-        # TODO: handle file not found
-        c = wconfig.readfile(webconfpath)
-        c.path = os.path.abspath(webconfpath)
-        return lui, c
-    elif repopath:  # imitate webconf for single repo
+        return lui, _readwebconf(webconfpath)
+    else:  # imitate webconf for single repo
         lui.readconfig(os.path.join(repopath, b'.hg', b'hgrc'), repopath)
         c = wconfig.config()
         try:
@@ -279,20 +413,16 @@ def _readconfig(ui: uimod.ui,
         except (OSError, error.Abort, error.RepoError):
             c.set(b'paths', b'/', repopath)
         return lui, c
-    else:
-        return lui, None
 
 def run(ui: uimod.ui, *pats, **opts) -> ServeDialog:
     # TODO: No known caller provides **opts so bytes vs str is unknown
     repopath = opts.get('root') or paths.find_root_bytes()
     webconfpath = opts.get('web_conf') or opts.get('webdir_conf')
 
-    lui, webconf = _readconfig(ui, repopath, webconfpath)
+    lui, webconf, port = _readconfig(ui, repopath, webconfpath)
     dlg = ServeDialog(lui, webconf=webconf)
-    try:
-        dlg.setport(int(lui.config(b'web', b'port')))
-    except ValueError:
-        pass
+    if port is not None:
+        dlg.setport(port)
 
     if repopath or webconfpath:
         dlg.start()
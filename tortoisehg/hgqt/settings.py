@@ -1604,6 +1604,7 @@ class SettingsForm(QWidget):
     def refresh(self, *args):
         # refresh config values
         self.ini = self.loadIniFile(self.rcpath)  # TODO: type this attr
+        theme.invalidate_available_themes()
         self.readonly = self.forcereadonly or not (hasattr(self.ini, 'write')
                                 and os.access(self.fn, os.W_OK))
         self.stack.setDisabled(self.readonly)
@@ -1847,6 +1848,7 @@ class SettingsForm(QWidget):
 
         try:
             wconfig.writefile(self.ini, hglib.fromunicode(self.fn))
+            theme.invalidate_available_themes()
             return True
         except OSError as e:
             qtlib.WarningMsgBox(_('Unable to write configuration file'),
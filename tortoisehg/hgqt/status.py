@@ -12,6 +12,7 @@ import os
 
 from .qtcore import (
     QAbstractTableModel,
+    QItemSelection,
     QItemSelectionModel,
     QMimeData,
     QModelIndex,
@@ -42,6 +43,7 @@ from .qtgui import (
     QShortcut,
     QSizePolicy,
     QSplitter,
+    QStyle,
     QStyleOptionViewItem,
     QStyledItemDelegate,
     QToolBar,
@@ -77,6 +79,7 @@ from . import (
 
 from typing import (
     Dict,
+    Tuple,
 )
 
 from .qtcore import Qt, QTimer
@@ -99,7 +102,25 @@ COL_PATH_DISPLAY = 3
 COL_EXTENSION = 4
 COL_SIZE = 5
 
-_colors = {}
+_colors: Dict[str, QColor] = {}
+_black = QColor('black')
+
+def _loadStatusColors() -> None:
+    """Determine the user configured status colors
+
+    Styles are configured once at startup, so this is parsed only once.
+    (in the future, we could support full rich-text tags)
+    """
+    if _colors:
+        return
+    labels = [(stat, val.uilabel) for stat, val in statusTypes.items()]
+    labels.extend([('r', 'resolve.resolved'), ('u', 'resolve.unresolved')])
+    for stat, label in labels:
+        effect = qtlib.geteffect(label)
+        for e in effect.split(';'):
+            if e.startswith('color:'):
+                _colors[stat] = QColor(e[7:])
+                break
 
 class StatusWidget(QWidget):
     '''Working copy status widget
@@ -132,18 +153,17 @@ class StatusWidget(QWidget):
         self.refthread = None
         self.refreshWctxLater = QTimer(self, interval=10, singleShot=True)
         self.refreshWctxLater.timeout.connect(self.refreshWctx)
+        # coalesce re-filtering while the filter text is being typed
+        self.setFilterLater = QTimer(self, interval=80, singleShot=True)
+        self.setFilterLater.timeout.connect(self._applyFilterText)
+        self._checkStatesChangedLater = QTimer(self, interval=16,
+                                               singleShot=True)
+        self._checkStatesChangedLater.timeout.connect(self._updateCheckStates)
         self.partials = {}
+        self._displayedFile = b''  # fileview.filePath() in bytes
+        self._resizedRowCount = None
 
-        # determine the user configured status colors
-        # (in the future, we could support full rich-text tags)
-        labels = [(stat, val.uilabel) for stat, val in statusTypes.items()]
-        labels.extend([('r', 'resolve.resolved'), ('u', 'resolve.unresolved')])
-        for stat, label in labels:
-            effect = qtlib.geteffect(label)
-            for e in effect.split(';'):
-                if e.startswith('color:'):
-                    _colors[stat] = QColor(e[7:])
-                    break
+        _loadStatusColors()
 
         split = QSplitter(Qt.Orientation.Horizontal)
         split.setChildrenCollapsible(False)
@@ -169,11 +189,8 @@ class StatusWidget(QWidget):
         le = QLineEdit()
         le.setPlaceholderText(_('### filter text ###'))
 
-        st = ''
-        for s in statusTypes:
-            val = statusTypes[s]
-            if self.opts[val.name]:
-                st = st + s
+        st = ''.join(s for s, val in statusTypes.items()
+                     if self.opts[val.name])
         self.statusfilter = StatusFilterActionGroup(
             statustext=st, types=StatusType.preferredOrder)
 
@@ -228,10 +245,13 @@ class StatusWidget(QWidget):
         tv.setRootIsDecorated(False)
         tv.setSelectionMode(QTreeView.SelectionMode.ExtendedSelection)
         tv.setTextElideMode(Qt.TextElideMode.ElideLeft)
+        tv.setUniformRowHeights(True)
+        tv.setHorizontalScrollMode(QTreeView.ScrollMode.ScrollPerPixel)
+        tv.setVerticalScrollMode(QTreeView.ScrollMode.ScrollPerPixel)
         tv.sortByColumn(COL_STATUS, Qt.SortOrder.AscendingOrder)
         tv.doubleClicked.connect(self.onRowDoubleClicked)
         tv.customContextMenuRequested.connect(self.onMenuRequest)
-        le.textEdited.connect(self.setFilter)
+        le.textEdited.connect(self._onFilterTextEdited)
 
         self.statusfilter.statusChanged.connect(self.setStatusFilter)
 
@@ -316,24 +336,19 @@ class StatusWidget(QWidget):
         self.fileview.saveSettings(qs, prefix+'/fileview')
         qs.setValue(prefix+'/state', self.split.saveState())
 
-    def _updatePartials(self, fd):
+    def _updatePartials(self, fd, wfile: bytes):
         # remove files from the partials dictionary if they are not partial
         # selections, in order to simplify refresh.
         model = self.tv.model()
         assert model is not None
-        dels = []
-        for file, oldchanges in self.partials.items():
-            assert file in model.checked, file
-            if oldchanges.excludecount == 0:
-                model.checked[file] = True
-                dels.append(file)
-            elif oldchanges.excludecount == len(oldchanges.hunks):
-                model.checked[file] = False
-                dels.append(file)
+        partials = self.partials
+        checked = model.checked
+        dels = [file for file, oldchanges in partials.items()
+                if oldchanges.excludecount in (0, len(oldchanges.hunks))]
         for file in dels:
-            del self.partials[file]
+            assert file in checked, file
+            checked[file] = partials.pop(file).excludecount == 0
 
-        wfile = hglib.fromunicode(fd.filePath())
         changes = fd.changes
         if changes is None:
             if wfile in self.partials:
@@ -345,26 +360,38 @@ class StatusWidget(QWidget):
             # merge selection state from old hunk list to new hunk list
             oldhunks = self.partials[wfile].hunks
             oldstates = {c.fromline: c.excluded for c in oldhunks}
+            # only touch chunks whose state changes; setChunkExcluded() looks
+            # the chunk up in the hunk list
             for chunk in changes.hunks:
-                if chunk.fromline in oldstates:
-                    fd.setChunkExcluded(chunk, oldstates[chunk.fromline])
+                excluded = oldstates.get(chunk.fromline, chunk.excluded)
+                if excluded != chunk.excluded:
+                    fd.setChunkExcluded(chunk, excluded)
         else:
             # the file was not in the partials dictionary, so it is either
             # checked (all changes enabled) or unchecked (all changes
             # excluded).
-            if wfile not in self.getChecked():
+            if not checked.get(wfile, False):
                 for chunk in changes.hunks:
-                    fd.setChunkExcluded(chunk, True)
+                    if not chunk.excluded:
+                        fd.setChunkExcluded(chunk, True)
         self.chunkSelectionChanged()
         self.partials[wfile] = changes
 
     @pyqtSlot()
     def chunkSelectionChanged(self):
         'checkbox state has changed via chunk selection'
+        # bursts of chunk toggles are reported to the view at once
+        self._checkStatesChangedLater.start()
+
+    @pyqtSlot()
+    def _updateCheckStates(self):
         # inform filelist view that the file selection state may have changed
         model = self.tv.model()
         if model:
-            model.layoutChanged.emit()
+            if model.rows:
+                model.dataChanged.emit(
+                    model.index(0, COL_PATH),
+                    model.index(len(model.rows) - 1, COL_PATH))
             model.checkCountChanged.emit()
 
     @pyqtSlot(QPoint)
@@ -423,6 +450,7 @@ class StatusWidget(QWidget):
             return
         self.refreshWctxLater.stop()
         self.fileview.clearDisplay()
+        self._displayedFile = b''
 
         # store selected paths or current path
         model = self.tv.model()
@@ -433,7 +461,7 @@ class StatusWidget(QWidget):
                 curpath = model.getRow(curidx)[COL_PATH]
             else:
                 curpath = None
-            spaths = [model.getRow(i)[COL_PATH] for i in smodel.selectedRows()]
+            spaths = {model.getRow(i)[COL_PATH] for i in smodel.selectedRows()}
             self.reselection = spaths, curpath
         else:
             self.reselection = None
@@ -461,7 +489,7 @@ class StatusWidget(QWidget):
         self.refthread = None
         if len(self.repo[None].parents()) > 1:
             # nuke partial selections if wctx has a merge in-progress
-            self.partials = {}
+            self.partials.clear()
         match = self.le.text()
         if match:
             self.setFilter(match)
@@ -495,18 +523,27 @@ class StatusWidget(QWidget):
                                     _('No files found for this operation'),
                                     parent=self)
         ms = hglib.readmergestate(self.repo)
-        tm = WctxModel(self._repoagent, wctx, wstatus, ms, self.pctx,
-                       self.savechecks, self.opts, checked, self,
-                       checkable=self.checkable, defcheck=self.defcheck,
-                       amending=amending)
-        if self.checkable:
-            tm.checkToggled.connect(self.checkToggled)
-            tm.checkCountChanged.connect(self.updateCheckCount)
+        if oldtm:
+            # reuse the model so the view can keep its state
+            tm = oldtm
+            tm.updateStatus(wctx, wstatus, ms, self.pctx, self.savechecks,
+                            self.opts, checked, defcheck=self.defcheck,
+                            amending=amending)
+        else:
+            tm = WctxModel(self._repoagent, wctx, wstatus, ms, self.pctx,
+                           self.savechecks, self.opts, checked, self,
+                           checkable=self.checkable, defcheck=self.defcheck,
+                           amending=amending)
+            if self.checkable:
+                tm.checkToggled.connect(self.checkToggled)
+                tm.checkAllToggled.connect(self._checkAllToggled)
+                tm.checkCountChanged.connect(self.updateCheckCount)
+            self.tv.setModel(tm)
+            selmodel = self.tv.selectionModel()
+            selmodel.currentChanged.connect(self.onCurrentChange)
+            selmodel.selectionChanged.connect(self.onSelectionChange)
         self.savechecks = True
 
-        self.tv.setModel(tm)
-        if oldtm:
-            oldtm.deleteLater()
         self.tv.setSortingEnabled(True)
         self.tv.setColumnHidden(COL_PATH, bool(wctx.p2()) or not self.checkable)
         self.tv.setColumnHidden(COL_MERGE_STATE, not tm.anyMerge())
@@ -514,15 +551,27 @@ class StatusWidget(QWidget):
             self.updateCheckCount()
 
         # remove non-existent file from partials table because model changed
-        for file in list(self.partials):
-            if file not in tm.checked:
-                del self.partials[file]
+        for file in self.partials.keys() - tm.checked.keys():
+            del self.partials[file]
 
-        for col in (COL_PATH, COL_STATUS, COL_MERGE_STATE):
-            w = self.tv.sizeHintForColumn(col)
-            self.tv.setColumnWidth(col, w)
-        for col in (COL_PATH_DISPLAY, COL_EXTENSION, COL_SIZE):
-            self.tv.resizeColumnToContents(col)
+        # check box and status letter columns have uniform contents, so don't
+        # let the view measure every row
+        if tm.rowCount(QModelIndex()):
+            w = self.tv.sizeHintForIndex(tm.index(0, COL_PATH)).width()
+            self.tv.setColumnWidth(COL_PATH, w)
+        margin = self.tv.style().pixelMetric(
+            QStyle.PixelMetric.PM_FocusFrameHMargin, None, self.tv) + 1
+        w = self.tv.fontMetrics().horizontalAdvance('M') + 2 * margin
+        self.tv.setColumnWidth(COL_STATUS, w)
+        self.tv.setColumnWidth(COL_MERGE_STATE, w)
+        # measuring contents walks the rows; don't bother if the file list
+        # barely changed since the last resize
+        nrows = len(tm.rows)
+        if (self._resizedRowCount is None or nrows == 0
+            or abs(nrows - self._resizedRowCount) >= 10):
+            for col in (COL_PATH_DISPLAY, COL_EXTENSION, COL_SIZE):
+                self.tv.resizeColumnToContents(col)
+            self._resizedRowCount = nrows
 
         # reset selection, or select first row
         curidx = tm.index(0, 0)
@@ -530,18 +579,30 @@ class StatusWidget(QWidget):
         flags = QItemSelectionModel.SelectionFlag.Select | QItemSelectionModel.SelectionFlag.Rows
         if self.reselection:
             selected, current = self.reselection
+            # collect contiguous runs of selected rows and apply them at once
+            selection = QItemSelection()
+            start = None
             for i, row in enumerate(tm.getAllRows()):
                 if row[COL_PATH] in selected:
-                    selmodel.select(tm.index(i, 0), flags)
+                    if start is None:
+                        start = i
+                elif start is not None:
+                    selection.select(tm.index(start, 0), tm.index(i - 1, 0))
+                    start = None
                 if row[COL_PATH] == current:
                     curidx = tm.index(i, 0)
+            if start is not None:
+                selection.select(tm.index(start, 0),
+                                 tm.index(len(tm.rows) - 1, 0))
         else:
-            selmodel.select(curidx, flags)
-        selmodel.currentChanged.connect(self.onCurrentChange)
-        selmodel.selectionChanged.connect(self.onSelectionChange)
+            selection = QItemSelection(curidx, curidx)
+        # the reset cleared the selection silently, so selecting anything
+        # emits selectionChanged, which updates the file actions
+        selmodel.select(selection, flags)
         if curidx and curidx.isValid():
             selmodel.setCurrentIndex(curidx, QItemSelectionModel.SelectionFlag.Current)
-        self.onSelectionChange()
+        if not selmodel.hasSelection():
+            self.onSelectionChange()
 
         self._togglefileshortcut.setEnabled(True)
 
@@ -563,18 +624,45 @@ class StatusWidget(QWidget):
 
     @pyqtSlot(str)
     def setStatusFilter(self, status: str) -> None:
-        for s in statusTypes:
-            val = statusTypes[s]
+        added = removed = ''
+        for s, val in statusTypes.items():
+            if self.opts[val.name] != (s in status):
+                if s in status:
+                    added += s
+                else:
+                    removed += s
             self.opts[val.name] = s in status
-        self.refreshWctx()
+        model = self.tv.model()
+        if added or not model or self.refthread:
+            self.refreshWctx()
+            return
+        # hiding status types doesn't need the working directory rescanned
+        if not model.removeStatuses(removed):
+            self.refreshWctx()
+            return
+        for file in self.partials.keys() - model.checked.keys():
+            del self.partials[file]
+        if self._displayedFile and self._displayedFile not in model.checked:
+            self.fileview.clearDisplay()
+            self._displayedFile = b''
+        self.tv.setColumnHidden(COL_MERGE_STATE, not model.anyMerge())
 
     @pyqtSlot(str)
     def setFilter(self, match):
+        self.setFilterLater.stop()
         model = self.tv.model()
         if model:
             model.setFilter(match)
             self._tvpaletteswitcher.enablefilterpalette(bool(match))
 
+    @pyqtSlot(str)
+    def _onFilterTextEdited(self, text):
+        self.setFilterLater.start()
+
+    @pyqtSlot()
+    def _applyFilterText(self):
+        self.setFilter(self.le.text())
+
     @pyqtSlot()
     def clearPattern(self):
         self.pats = []
@@ -597,15 +685,27 @@ class StatusWidget(QWidget):
             self.checkAllNoneBtn.setTristate(state == Qt.CheckState.PartiallyChecked)
             self.checkAllNoneBtn.setCheckState(state)
 
-    @pyqtSlot(str, bool)
-    def checkToggled(self, wfile, checked):
+    @pyqtSlot(object, bool)
+    def checkToggled(self, wfile: bytes, checked):
         'user has toggled a checkbox, update partial chunk selection status'
-        wfile = hglib.fromunicode(wfile)
         if wfile in self.partials:
             del self.partials[wfile]
-            if wfile == hglib.fromunicode(self.fileview.filePath()):
+            if wfile == self._displayedFile:
                 self.onCurrentChange(self.tv.currentIndex())
 
+    @pyqtSlot(bool)
+    def _checkAllToggled(self, checked):
+        'all listed files were (un)checked, drop their chunk selections'
+        model = self.tv.model()
+        if not self.partials or not model:
+            return
+        listed = {row[COL_PATH] for row in model.rows}
+        dropped = self.partials.keys() & listed
+        for wfile in dropped:
+            del self.partials[wfile]
+        if self._displayedFile in dropped:
+            self.onCurrentChange(self.tv.currentIndex())
+
     def checkAll(self):
         model = self.tv.model()
         if model:
@@ -628,28 +728,23 @@ class StatusWidget(QWidget):
     def getChecked(self, types=None):
         model = self.tv.model()
         if model:
-            checked = model.getChecked()
+            checked = model.checked
+            partials = self.partials
+            # files with at least one included chunk count as checked,
+            # regardless of the checkbox state
+            included = {f for f, c in partials.items()
+                        if c.excludecount < len(c.hunks)}
             if types is None:
-                files = []
-                for f, v in checked.items():
-                    if f in self.partials:
-                        changes = self.partials[f]
-                        if changes.excludecount < len(changes.hunks):
-                            files.append(f)
-                    elif v:
-                        files.append(f)
-                return files
+                return [f for f, v in checked.items()
+                        if f in included or (v and f not in partials)]
             else:
                 files = []
-                for row in model.getAllRows():
-                    path, status, mst, upath, ext, sz = row
-                    if status in types:
-                        if path in self.partials:
-                            changes = self.partials[path]
-                            if changes.excludecount < len(changes.hunks):
-                                files.append(path)
-                        elif checked[path]:
-                            files.append(path)
+                for path, status, mst, upath, ext, sz in model.getAllRows():
+                    if status not in types:
+                        continue
+                    if path in included or (checked[path]
+                                            and path not in partials):
+                        files.append(path)
                 return files
         else:
             return []
@@ -660,7 +755,8 @@ class StatusWidget(QWidget):
         selmodel = self.tv.selectionModel()
         assert model is not None
         assert selmodel is not None
-        selfds = pycompat.maplist(model.fileData, selmodel.selectedRows())
+        fileData = model.fileData
+        selfds = [fileData(index) for index in selmodel.selectedRows()]
         self._fileactions.setFileDataList(selfds)
 
     # Disabled decorator because of bug in older PyQt releases
@@ -672,16 +768,16 @@ class StatusWidget(QWidget):
         assert model is not None
         fd = model.fileData(index)
         fd.load(changeselect)
+        self._displayedFile = wfile = hglib.fromunicode(fd.filePath())
         if changeselect and not fd.isNull() and not fd.subrepoType():
-            self._updatePartials(fd)
+            self._updatePartials(fd, wfile)
         self.fileview.display(fd)
 
     def _setCheckStateOfSelectedFiles(self, value):
         model = self.tv.model()
         assert model is not None
         selmodel = self.tv.selectionModel()
-        for index in selmodel.selectedRows(COL_PATH):
-            model.setData(index, value, Qt.ItemDataRole.CheckStateRole)
+        model.setCheckStates(selmodel.selectedRows(COL_PATH), value)
 
     @pyqtSlot()
     def _checkSelectedFiles(self):
@@ -697,12 +793,14 @@ class StatusWidget(QWidget):
         selmodel = self.tv.selectionModel()
         assert model is not None
         assert selmodel is not None
+        checkedrows, uncheckedrows = [], []
         for index in selmodel.selectedRows(COL_PATH):
             if model.data(index, Qt.ItemDataRole.CheckStateRole) == Qt.CheckState.Checked:
-                newvalue = Qt.CheckState.Unchecked
+                checkedrows.append(index)
             else:
-                newvalue = Qt.CheckState.Checked
-            model.setData(index, newvalue, Qt.ItemDataRole.CheckStateRole)
+                uncheckedrows.append(index)
+        model.setCheckStates(checkedrows, Qt.CheckState.Unchecked)
+        model.setCheckStates(uncheckedrows, Qt.CheckState.Checked)
 
 
 class StatusThread(QThread):
@@ -742,9 +840,9 @@ class StatusThread(QThread):
                         continue
                     val = statusTypes[stat]
                     if self.opts[val.name]:
-                        d = {fn: precheckfn(i)
-                                  for fn in getattr(status, val.name)}
-                        patchecked.update(d)
+                        # pre-check state only depends on the status type
+                        patchecked.update(dict.fromkeys(
+                            getattr(status, val.name), precheckfn(i)))
                 wctx = context.workingctx(self.repo, changes=status)
                 self.patchecked = patchecked
             elif self.pctx:
@@ -841,7 +939,12 @@ class WctxFileTree(QTreeView):
 
 class WctxModel(QAbstractTableModel):
     checkCountChanged = pyqtSignal()
-    checkToggled = pyqtSignal(str, bool)
+    checkToggled = pyqtSignal(object, bool)  # (path: bytes, checked)
+    checkAllToggled = pyqtSignal(bool)  # all listed rows at once
+
+    _itemFlags = (Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled
+                  | Qt.ItemFlag.ItemIsDragEnabled)
+    _checkableItemFlags = _itemFlags | Qt.ItemFlag.ItemIsUserCheckable
 
     def __init__(self, repoagent, wctx,
                  wstatus: scmutil.status,
@@ -857,28 +960,98 @@ class WctxModel(QAbstractTableModel):
     ) -> None:
         QAbstractTableModel.__init__(self, parent)
         self._repoagent = repoagent
-        self._pctx = pctx
         self.partials = parent.partials
+        self.checkable = checkable
+        self.headers = ('*', _('Stat'), _('M'), _('Filename'),
+                        _('Type'), _('Size (KB)'))
+        self._populate(wctx, wstatus, ms, pctx, savechecks, opts, checked,
+                       defcheck, amending)
+
+    def updateStatus(self, wctx,
+                     wstatus: scmutil.status,
+                     ms: mergestatemod.mergestate,
+                     pctx,
+                     savechecks: bool,
+                     opts,
+                     checked: Dict[bytes, bool],
+                     defcheck: str='MAR!S',
+                     amending=None,
+    ) -> None:
+        """Replace all rows in place by the given working directory status"""
+        self.beginResetModel()
+        self._populate(wctx, wstatus, ms, pctx, savechecks, opts, checked,
+                       defcheck, amending)
+        self.endResetModel()
+
+    def _populate(self, wctx,
+                  wstatus: scmutil.status,
+                  ms: mergestatemod.mergestate,
+                  pctx,
+                  savechecks: bool,
+                  opts,
+                  checked: Dict[bytes, bool],
+                  defcheck: str,
+                  amending,
+    ) -> None:
+        self._pctx = pctx
+        util.clearcachedproperty(self, 'workingContext')
         self.checkCount = 0
         rows = []
         nchecked: Dict[bytes, bool] = {}
         excludestr = opts.get('ciexclude', '')
         assert isinstance(excludestr, str)
-        excludes = [f.strip() for f in hglib.fromunicode(excludestr).split(b',')]
+        excludes = frozenset(f.strip() for f
+                             in hglib.fromunicode(excludestr).split(b','))
         if amending is None:
             amending = set()
 
+        if os.name == 'nt':
+            # listing a directory yields the sizes of all its files at once,
+            # whereas each stat call is expensive on Windows. A directory is
+            # only listed once it has more than a few listed files, since it
+            # may hold many others (e.g. build output).
+            wjoin = self._repoagent.rawRepo().wjoin
+            dirsizes: Dict[bytes, Dict[bytes, int]] = {}
+            dirhits: Dict[bytes, int] = {}
+
+            def filesize(fname: bytes, st: str) -> int:
+                if st == 'S':
+                    return wctx[fname].size()
+                dirname, _sep, basename = fname.rpartition(b'/')
+                try:
+                    sizes = dirsizes[dirname]
+                except KeyError:
+                    hits = dirhits[dirname] = dirhits.get(dirname, 0) + 1
+                    if hits <= 4:
+                        return wctx[fname].size()
+                    sizes = dirsizes[dirname] = _listFileSizes(wjoin(dirname))
+                try:
+                    return sizes[basename]
+                except KeyError:
+                    # the case of a dirstate path may differ from the one on
+                    # disk (NTFS is case-insensitive)
+                    return wctx[fname].size()
+        else:
+            def filesize(fname: bytes, st: str) -> int:
+                return wctx[fname].size()
+
+        # most files share a few extensions; decode each of them once
+        uexts: Dict[bytes, str] = {}
+
         def mkrow(fname: bytes, st: str):
-            ext, sizek = '', ''
+            ext, sizek = b'', ''
             try:
                 mst = fname in ms and pycompat.sysstr(ms[fname].upper()) or ""
                 name, ext = os.path.splitext(fname)
-                sizebytes = wctx[fname].size()
+                sizebytes = filesize(fname, st)
                 sizek = (sizebytes + 1023) // 1024
             except OSError:
                 pass
-            return [fname, st, mst, hglib.tounicode(fname),
-                    hglib.tounicode(ext[1:]), sizek]
+            try:
+                uext = uexts[ext]
+            except KeyError:
+                uext = uexts[ext] = hglib.tounicode(ext[1:])
+            return (fname, st, mst, hglib.tounicode(fname), uext, sizek)
         if not savechecks:
             checked: Dict[bytes, bool] = {}
         if pctx:
@@ -895,45 +1068,57 @@ class WctxModel(QAbstractTableModel):
 
         else:
             pctxmatch = lambda f: True
+
+        def initialcheck(f: bytes, enabled: bool) -> bool:
+            # the defaults are only consulted for files not seen before
+            try:
+                return checked[f]
+            except KeyError:
+                return enabled and f not in excludes and pctxmatch(f)
+
         if opts['modified']:
+            default = 'M' in defcheck
             for m in wstatus.modified:
-                nchecked[m] = checked.get(m, 'M' in defcheck and
-                                          m not in excludes and pctxmatch(m))
+                nchecked[m] = initialcheck(m, default)
                 rows.append(mkrow(m, 'M'))
         if opts['added']:
+            default = 'A' in defcheck
             for a in wstatus.added:
-                nchecked[a] = checked.get(a, 'A' in defcheck and
-                                          a not in excludes and pctxmatch(a))
+                nchecked[a] = initialcheck(a, default)
                 rows.append(mkrow(a, 'A'))
         if opts['removed']:
+            default = 'R' in defcheck
             for r in wstatus.removed:
-                nchecked[r] = checked.get(r, 'R' in defcheck and
-                                          r not in excludes and pctxmatch(r))
+                nchecked[r] = initialcheck(r, default)
                 rows.append(mkrow(r, 'R'))
         if opts['deleted']:
+            default = 'D' in defcheck
             for d in wstatus.deleted:
-                nchecked[d] = checked.get(d, 'D' in defcheck and
-                                          d not in excludes and pctxmatch(d))
+                nchecked[d] = initialcheck(d, default)
                 rows.append(mkrow(d, '!'))
         if opts['unknown']:
+            default = '?' in defcheck
             for u in wstatus.unknown or []:
-                nchecked[u] = checked.get(u, '?' in defcheck)
+                nchecked[u] = checked.get(u, default)
                 rows.append(mkrow(u, '?'))
         if opts['ignored']:
+            default = 'I' in defcheck
             for i in wstatus.ignored or []:
-                nchecked[i] = checked.get(i, 'I' in defcheck)
+                nchecked[i] = checked.get(i, default)
                 rows.append(mkrow(i, 'I'))
         if opts['clean']:
+            default = 'C' in defcheck
             for c in wstatus.clean or []:
-                nchecked[c] = checked.get(c, 'C' in defcheck)
+                nchecked[c] = checked.get(c, default)
                 rows.append(mkrow(c, 'C'))
         if opts['subrepo']:
+            default = 'S' in defcheck
             for s in wctx.dirtySubrepos:
-                nchecked[s] = checked.get(s, 'S' in defcheck and
-                                          s not in excludes)
+                nchecked[s] = checked.get(s, default and s not in excludes)
                 rows.append(mkrow(s, 'S'))
-        # include clean unresolved files
-        for f in ms:
+        # include clean unresolved files (unresolved() also yields path
+        # conflicts, which aren't listed)
+        for f in ms.unresolved():
             if ms[f] == b'u' and f not in nchecked:
                 nchecked[f] = checked.get(f, True)
                 rows.append(mkrow(f, 'C'))
@@ -942,18 +1127,26 @@ class WctxModel(QAbstractTableModel):
         # status is calculated against that node for amends.  But they are
         # really modified.  So force those clean files to show, and to be in
         # the checked state.
-        for f in amending:
-            if f not in nchecked:
-                nchecked[f] = checked.get(f, True)
-                rows.append(mkrow(f, 'C'))
+        for f in amending - nchecked.keys():
+            nchecked[f] = checked.get(f, True)
+            rows.append(mkrow(f, 'C'))
 
-        self.headers = ('*', _('Stat'), _('M'), _('Filename'),
-                        _('Type'), _('Size (KB)'))
         self.checked = nchecked
         self.unfiltered = rows
         self.rows = rows
-        self.checkable = checkable
         self.amending = amending
+        self._tooltips: Dict[bytes, str] = {}  # filled as rows are hovered
+        # only a handful of distinct (status, merge state) pairs exist
+        self._fgcolors: Dict[Tuple[str, str], QColor] = {}
+        for row in rows:
+            key = (row[COL_STATUS], row[COL_MERGE_STATE])
+            if key not in self._fgcolors:
+                status, mst = key
+                if mst:
+                    self._fgcolors[key] = _colors.get(mst.lower(), _black)
+                else:
+                    self._fgcolors[key] = _colors.get(status, _black)
+        self._filter = ''
 
     def rowCount(self, parent):
         if parent.isValid():
@@ -961,10 +1154,13 @@ class WctxModel(QAbstractTableModel):
         return len(self.rows)
 
     def checkAll(self, state):
+        checked = self.checked
         for data in self.rows:
-            self.checked[data[0]] = state
-            self.checkToggled.emit(data[3], state)
-        self.layoutChanged.emit()
+            checked[data[COL_PATH]] = state
+        self.checkAllToggled.emit(state)
+        if self.rows:
+            self.dataChanged.emit(self.index(0, COL_PATH),
+                                  self.index(len(self.rows) - 1, COL_PATH))
         self.checkCountChanged.emit()
 
     def columnCount(self, parent):
@@ -998,14 +1194,15 @@ class WctxModel(QAbstractTableModel):
         elif role == Qt.ItemDataRole.DisplayRole:
             return self.rows[index.row()][index.column()]
         elif role == Qt.ItemDataRole.ForegroundRole:
-            path, status, mst, upath, ext, sz = self.rows[index.row()]
-            if mst:
-                return _colors.get(mst.lower(), QColor('black'))
-            else:
-                return _colors.get(status, QColor('black'))
+            row = self.rows[index.row()]
+            return self._fgcolors[(row[COL_STATUS], row[COL_MERGE_STATE])]
         elif role == Qt.ItemDataRole.ToolTipRole:
             path, status, mst, upath, ext, sz = self.rows[index.row()]
-            return statusMessage(status, mst, upath)
+            try:
+                return self._tooltips[path]
+            except KeyError:
+                tip = self._tooltips[path] = statusMessage(status, mst, upath)
+                return tip
         '''
         elif role == Qt.ItemDataRole.DecorationRole and index.column() == COL_STATUS:
             if status in statusTypes:
@@ -1021,21 +1218,46 @@ class WctxModel(QAbstractTableModel):
         if (index.column() == COL_PATH and role == Qt.ItemDataRole.CheckStateRole
             and self.checkable):
             value = qtlib.toCheckStateEnum(value)
+            path = self.rows[index.row()][COL_PATH]
+            checked = (value == Qt.CheckState.Checked)
 
-            if self.data(index, role) == value:
+            if path in self.partials:
+                if self.data(index, role) == value:
+                    return True
+            elif (self.checked[path] == checked
+                  and value != Qt.CheckState.PartiallyChecked):
                 return True
             if value not in (Qt.CheckState.Checked, Qt.CheckState.Unchecked):
                 # Qt.CheckState.PartiallyChecked cannot be set explicitly
                 return False
-            path = self.rows[index.row()][COL_PATH]
-            upath = self.rows[index.row()][COL_PATH_DISPLAY]
-            self.checked[path] = checked = (value == Qt.CheckState.Checked)
-            self.checkToggled.emit(upath, checked)
+            self.checked[path] = checked
+            self.checkToggled.emit(path, checked)
             self.checkCountChanged.emit()
             self.dataChanged.emit(index, index)
             return True
         return False
 
+    def setCheckStates(self, indexes, value) -> None:
+        """Set the check state of many rows, notifying the view only once"""
+        if not self.checkable:
+            return
+        value = qtlib.toCheckStateEnum(value)
+        assert value in (Qt.CheckState.Checked, Qt.CheckState.Unchecked), value
+        checked = (value == Qt.CheckState.Checked)
+        changedrows = []
+        for index in indexes:
+            if self.data(index, Qt.ItemDataRole.CheckStateRole) == value:
+                continue
+            path = self.rows[index.row()][COL_PATH]
+            self.checked[path] = checked
+            self.checkToggled.emit(path, checked)
+            changedrows.append(index.row())
+        if not changedrows:
+            return
+        self.checkCountChanged.emit()
+        self.dataChanged.emit(self.index(min(changedrows), COL_PATH),
+                              self.index(max(changedrows), COL_PATH))
+
     def headerData(self, col, orientation, role):
         if role != Qt.ItemDataRole.DisplayRole or orientation != Qt.Orientation.Horizontal:
             return None
@@ -1043,28 +1265,75 @@ class WctxModel(QAbstractTableModel):
             return self.headers[col]
 
     def flags(self, index):
-        flags = Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsDragEnabled
         if index.column() == COL_PATH and self.checkable:
-            flags |= Qt.ItemFlag.ItemIsUserCheckable
-        return flags
+            return self._checkableItemFlags
+        return self._itemFlags
 
     def mimeTypes(self):
         return ['text/uri-list']
 
     def mimeData(self, indexes):
-        repo = self._repoagent.rawRepo()
-        urls = []
-        for index in indexes:
-            if index.column() != 0:
-                continue
-            path = self.rows[index.row()][COL_PATH]
-            urls.append(QUrl.fromLocalFile(hglib.tounicode(repo.wjoin(path))))
+        wjoin = self._repoagent.rawRepo().wjoin
+        # one url per row, in selection order
+        rows = dict.fromkeys(index.row() for index in indexes
+                             if index.column() == 0)
+        urls = [QUrl.fromLocalFile(hglib.tounicode(wjoin(self.rows[i][COL_PATH])))
+                for i in rows]
         data = QMimeData()
         data.setUrls(urls)
         return data
 
     # Custom methods
 
+    def removeStatuses(self, statuses: str) -> bool:
+        """Remove rows of the given status types in place
+
+        Returns False, leaving the model unchanged, if an unresolved or
+        amended file has one of these statuses; a rescan lists it as clean.
+        """
+        amending = self.amending
+        for row in self.unfiltered:
+            if (row[COL_STATUS] in statuses and row[COL_STATUS] != 'C'
+                and (row[COL_MERGE_STATE] == 'U'
+                     or row[COL_PATH] in amending)):
+                return False
+
+        def isremoved(row):
+            if row[COL_STATUS] not in statuses:
+                return False
+            # unresolved and amended files are listed even if clean
+            return not (row[COL_STATUS] == 'C'
+                        and (row[COL_MERGE_STATE] == 'U'
+                             or row[COL_PATH] in self.amending))
+
+        unfiltered = []
+        for row in self.unfiltered:
+            if isremoved(row):
+                del self.checked[row[COL_PATH]]
+            else:
+                unfiltered.append(row)
+        if len(unfiltered) == len(self.unfiltered):
+            return True
+        shared = self.rows is self.unfiltered
+        if shared:
+            self.rows = self.rows[:]
+
+        # remove contiguous runs of rows from the bottom, so the view can
+        # keep the selection of the remaining rows
+        gone = [i for i, row in enumerate(self.rows) if isremoved(row)]
+        while gone:
+            end = start = gone.pop()
+            while gone and gone[-1] == start - 1:
+                start = gone.pop()
+            self.beginRemoveRows(QModelIndex(), start, end)
+            del self.rows[start:end + 1]
+            self.endRemoveRows()
+        if shared:
+            self.rows = unfiltered
+        self.unfiltered = unfiltered
+        self.checkCountChanged.emit()
+        return True
+
     def anyMerge(self):
         for r in self.rows:
             if r[COL_MERGE_STATE]:
@@ -1099,91 +1368,104 @@ class WctxModel(QAbstractTableModel):
 
     def sort(self, col, order):
         self.layoutAboutToBeChanged.emit()
-        self.beginResetModel()
-
-        def getStatusRank(value):
-            """Helper function used to sort items according to their hg status
-
-            Statuses are ranked in the following order:
-                'S','M','A','R','!','?','C','I',''
-            """
-            sortList = ['S','M','A','R','!','?','C','I','']
-
-            try:
-                rank = sortList.index(value)
-            except (IndexError, ValueError):
-                rank = len(sortList) # Set the lowest rank by default
-
-            return rank
-
-        def getMergeStatusRank(value):
-            """Helper function used to sort according to item merge status
-
-            Merge statuses are ranked in the following order:
-                'S','U','R',''
-            """
-            sortList = ['S','U','R','']
-
-            try:
-                rank = sortList.index(value)
-            except (IndexError, ValueError):
-                rank = len(sortList) # Set the lowest rank by default
-
-            return rank
+        oldindexes, oldpaths = self._savePersistentPaths()
 
         # We want to sort the list by one of the columns (checked state,
         # mercurial status, file path, file extension, etc)
         # However, for files which have the same status or extension, etc,
         # we want them to be sorted alphabetically (without taking into account
         # the case)
-        # The sort function is guaranteed to be stable.
+        # The sort function is guaranteed to be stable, even with reverse=True.
         # Thus we can perform the sort in two passes:
-        # 1.- Perform a secondary sort by path
+        # 1.- Perform a secondary sort by path, always ascending
         # 2.- Perform a primary sort by the actual column that we are sorting on
-
-        # Secondary sort:
-        self.rows.sort(key=lambda x: x[COL_PATH].lower())
+        descending = order == Qt.SortOrder.DescendingOrder
+        pathkey = lambda x: x[COL_PATH].lower()
 
         if col == COL_PATH_DISPLAY:
-            # Already sorted!
-            pass
+            self.rows.sort(key=pathkey, reverse=descending)
         else:
-            if order == Qt.SortOrder.DescendingOrder:
-                # We want the secondary sort to be by _ascending_ path,
-                # even when the primary sort is in descending order
-                self.rows.reverse()
+            # Secondary sort:
+            self.rows.sort(key=pathkey)
 
             # Now we can perform the primary sort
             if col == COL_PATH:
                 c = self.checked
-                self.rows.sort(key=lambda x: c[x[col]])
+                key = lambda x: c[x[col]]
             elif col == COL_STATUS:
-                self.rows.sort(key=lambda x: getStatusRank(x[col]))
+                ranks = _statusRanks
+                key = lambda x: ranks.get(x[col], len(ranks))
             elif col == COL_MERGE_STATE:
-                self.rows.sort(key=lambda x: getMergeStatusRank(x[col]))
+                ranks = _mergeStatusRanks
+                key = lambda x: ranks.get(x[col], len(ranks))
             elif col == COL_SIZE:
-                self.rows.sort(key=lambda x: -1 if x[col] == '' else x[col])
+                key = lambda x: -1 if x[col] == '' else x[col]
             else:
-                self.rows.sort(key=lambda x: x[col])
+                key = lambda x: x[col]
+            self.rows.sort(key=key, reverse=descending)
 
-        if order == Qt.SortOrder.DescendingOrder:
-            self.rows.reverse()
+        self._restorePersistentPaths(oldindexes, oldpaths)
         self.layoutChanged.emit()
-        self.endResetModel()
 
     def setFilter(self, match: str):
         'simple match in filename filter'
+        if match == self._filter:
+            return
+        # while typing, the new text usually extends the old one; then only
+        # the rows matching the old text can match
+        if self._filter in match:
+            candidates = self.rows
+        else:
+            candidates = self.unfiltered
+        self._filter = match
         self.layoutAboutToBeChanged.emit()
-        self.beginResetModel()
-        self.rows = [r for r in self.unfiltered
+        oldindexes, oldpaths = self._savePersistentPaths()
+        self.rows = [r for r in candidates
                      if match in r[COL_PATH_DISPLAY]]
+        self._restorePersistentPaths(oldindexes, oldpaths)
         self.layoutChanged.emit()
-        self.endResetModel()
+
+    def _savePersistentPaths(self):
+        # rows are rearranged without resetting the model, so that the view
+        # can keep its selection and current row
+        oldindexes = self.persistentIndexList()
+        oldpaths = [self.rows[index.row()][COL_PATH] for index in oldindexes]
+        return oldindexes, oldpaths
+
+    def _restorePersistentPaths(self, oldindexes, oldpaths) -> None:
+        if not oldindexes:
+            return
+        wanted = set(oldpaths)
+        newrows = {row[COL_PATH]: i for i, row in enumerate(self.rows)
+                   if row[COL_PATH] in wanted}
+        newindexes = []
+        for index, path in zip(oldindexes, oldpaths):
+            if path in newrows:
+                newindexes.append(self.index(newrows[path], index.column()))
+            else:
+                newindexes.append(QModelIndex())
+        self.changePersistentIndexList(oldindexes, newindexes)
 
     def getChecked(self) -> Dict[bytes, bool]:
         assert len(self.checked) == len(self.unfiltered)
         return self.checked.copy()
 
+# sort order of status and merge status columns; unknown values sort last
+_statusRanks = {c: i for i, c in enumerate(['S','M','A','R','!','?','C','I',''])}
+_mergeStatusRanks = {c: i for i, c in enumerate(['S','U','R',''])}
+
+def _listFileSizes(path: bytes) -> Dict[bytes, int]:
+    """Map names of the non-directory entries in path to their sizes"""
+    sizes = {}
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if not entry.is_dir(follow_symlinks=False):
+                    sizes[entry.name] = entry.stat(follow_symlinks=False).st_size
+    except OSError:
+        pass
+    return sizes
+
 def statusMessage(status: str, mst: str, upath: str):
     tip = ''
     if status in statusTypes:
@@ -1238,7 +1520,8 @@ class StatusFilterActionGroup(QObject):
         if types is not None:
             self._TYPES = types
 
-        self._actions = {}
+        self._settingStatus = False
+        self._actions = {}  # in _TYPES order
         for c in self._TYPES:
             st = statusTypes[c]
             a = QAction('&%s %s' % (c, st.trname), self)
@@ -1249,10 +1532,12 @@ class StatusFilterActionGroup(QObject):
 
     @pyqtSlot()
     def _update(self):
+        if self._settingStatus:
+            return
         self.statusChanged.emit(self.status())
 
     def actions(self):
-        return [self._actions[c] for c in self._TYPES]
+        return list(self._actions.values())
 
     def isChecked(self, c):
         return self._actions[c].isChecked()
@@ -1262,15 +1547,23 @@ class StatusFilterActionGroup(QObject):
 
     def status(self):
         """Return the text for status filter"""
-        return ''.join(c for c in self._TYPES
-                       if self._actions[c].isChecked())
+        return ''.join(c for c, a in self._actions.items() if a.isChecked())
 
     @pyqtSlot(str)
     def setStatus(self, text):
         """Set the status text"""
         assert all(c in self._TYPES for c in text), repr(text)
-        for c in self._TYPES:
-            self._actions[c].setChecked(c in text)
+        # report the new status once, not for each toggled action
+        oldstatus = self.status()
+        self._settingStatus = True
+        try:
+            for c, a in self._actions.items():
+                a.setChecked(c in text)
+        finally:
+            self._settingStatus = False
+        newstatus = self.status()
+        if newstatus != oldstatus:
+            self.statusChanged.emit(newstatus)
 
 
 def createStatusFilterMenuButton(actiongroup, parent=None):
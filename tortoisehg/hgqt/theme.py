@@ -15,12 +15,14 @@
 #   - #RRGGBB
 #   - rgb(r, g, b)
 #
-# Built-in themes define colors using QColor objects directly.
+# Built-in themes define colors as #RRGGBB strings, which are turned into
+# QColor objects only for the selected theme.
 #
 # Theme changes require application restart.
 
+import functools
 import re
-from typing import Optional
+from typing import Optional, Tuple
 
 from .qtgui import QColor
 
@@ -32,92 +34,98 @@ from mercurial import pycompat
 # Built-in themes (single source of truth).
 # The first theme is the base and defines all required color keys.
 # Other themes are partial overlays on top of it.
+# Colors are kept as strings; see load_theme_colors().
 # ----------------------------------------------------------------------
 
+# Syntax colors shared by all built-in themes
+_SHARED_SYNTAX = {
+    'syntax_keyword': '#8080FF',
+    'syntax_function': '#80FFFF',
+    'syntax_class': "#fa7304",
+    'syntax_number': '#FFB86C',
+    'syntax_string': '#E98D8D',
+    'syntax_comment': "#608B4E",
+    'syntax_operator': "#569CD6",
+}
+
 BUILTIN_THEMES = {
 
     'dark': {
         'colors': {
 
             # --- Core UI and text ---
-            'background': QColor('#1E1E1E'),
-            'backgroundLighter': QColor('#252525'),
-            'text': QColor('#A0AA82'),
-            'text_disabled': QColor('#787878'),
-            'text_margin': QColor('#96966E'),
-            'text_author': QColor('#999999'),          # for Author/Age/Tags/Phase 
-            'text_description': QColor('#A0AA82'),     # for revision Description
-            'text_selection': QColor('#d4d4d4'),
-            'selection_background': QColor('#2E343A'),
-            'selection_text': QColor('#d4d4d4'),
-            'caret_foreground': QColor('#dcdcdc'),
+            'background': '#1E1E1E',
+            'backgroundLighter': '#252525',
+            'text': '#A0AA82',
+            'text_disabled': '#787878',
+            'text_margin': '#96966E',
+            'text_author': '#999999',          # for Author/Age/Tags/Phase 
+            'text_description': '#A0AA82',     # for revision Description
+            'text_selection': '#d4d4d4',
+            'selection_background': '#2E343A',
+            'selection_text': '#d4d4d4',
+            'caret_foreground': '#dcdcdc',
 
             # --- Diff and file status ---
-            'diff_text': QColor("#A6AA82"),
-            'diff_start': QColor('#D38AD3'),
-            'diff_added': QColor("#4EDF4E"),
-            'diff_removed': QColor("#F34D55"),
-            'diff_selected': QColor("#141414"),
-            'diff_excluded': QColor("#26282E"),
-            'diff_added_bg': QColor("#1C3A23"),
-            'diff_removed_bg': QColor("#3A1C23"),
-            'diff_added2_bg': QColor("#24244A"),
-            'reject_baseline_bg': QColor("#1C2A3A"),
-            'file_modified': QColor("#548CC4"),
-            'file_resolved': QColor("#30AF50"),
-            'file_added': QColor('#6FCF97'),
-            'file_removed': QColor("#D6646A"),
-            'file_deleted': QColor("#D36268"),
-            'file_missing': QColor('#E6C07B'),
-            'file_unknown': QColor('#4A6A82'),
-            'file_ignored': QColor('#96966E'),
-            'file_clean': QColor('#A0AA82'),
+            'diff_text': "#A6AA82",
+            'diff_start': '#D38AD3',
+            'diff_added': "#4EDF4E",
+            'diff_removed': "#F34D55",
+            'diff_selected': "#141414",
+            'diff_excluded': "#26282E",
+            'diff_added_bg': "#1C3A23",
+            'diff_removed_bg': "#3A1C23",
+            'diff_added2_bg': "#24244A",
+            'reject_baseline_bg': "#1C2A3A",
+            'file_modified': "#548CC4",
+            'file_resolved': "#30AF50",
+            'file_added': '#6FCF97',
+            'file_removed': "#D6646A",
+            'file_deleted': "#D36268",
+            'file_missing': '#E6C07B',
+            'file_unknown': '#4A6A82',
+            'file_ignored': '#96966E',
+            'file_clean': '#A0AA82',
 
             # --- Controls and UI feedback ---
-            'control_background': QColor('#2b2b2b'),
-            'control_hover': QColor('#656565'),
-            'control_pressed': QColor('#5e81ac'),
-            'control_border': QColor('#3c3c3c'),
-            'control_text': QColor('#d4d4d4'),
-            'header_background': QColor('#252526'),
-            'header_text': QColor('#DCC896'),
-            'ui_error': QColor('#3C2828'),
-            'ui_warning': QColor('#373723'),
-            'ui_control': QColor('#806464'),
-            'ui_info': QColor('#6392ac'),
-            'error_text': QColor('#f48771'),
-            'warning_text': QColor('#C23A28'),
-            'success_text': QColor('#769e76'),
-            'success_background': QColor('#2f4f2f'),
-            'error_background': QColor('#4f2f2f'),
-            'warning_background': QColor('#1E1E1E'),
+            'control_background': '#2b2b2b',
+            'control_hover': '#656565',
+            'control_pressed': '#5e81ac',
+            'control_border': '#3c3c3c',
+            'control_text': '#d4d4d4',
+            'header_background': '#252526',
+            'header_text': '#DCC896',
+            'ui_error': '#3C2828',
+            'ui_warning': '#373723',
+            'ui_control': '#806464',
+            'ui_info': '#6392ac',
+            'error_text': '#f48771',
+            'warning_text': '#C23A28',
+            'success_text': '#769e76',
+            'success_background': '#2f4f2f',
+            'error_background': '#4f2f2f',
+            'warning_background': '#1E1E1E',
 
             # --- Special and window elements ---
-            'chip_text': QColor('#dddbdb'),
-            'chip_branch_background': QColor('#3c723c'),
-            'chip_tag_background': QColor('#8a7b29'),
-            'chip_bookmark_background': QColor('#68683d'),
-            'chip_curbookmark_background': QColor('#7c6627'),
-            'chip_topic_background': QColor('#25794f'),
-            'brace_match_bg': QColor('#50501E'),
-            'brace_match_fg': QColor('#F0F0B4'),
-            'brace_bad_bg': QColor('#3C1414'),
-            'brace_bad_fg': QColor('#FF7878'),
-            'chunks_vertical_line': QColor('#9B6AD8'), # shelve tool / chunk separator
-            'config_scrollbar': QColor('#4c566a'),     # mercurial.ini editor
-            'titlebar_background': QColor('#252526'), # Windows 11 title bar
-            'titlebar_text': QColor('#d4d4d4'),
+            'chip_text': '#dddbdb',
+            'chip_branch_background': '#3c723c',
+            'chip_tag_background': '#8a7b29',
+            'chip_bookmark_background': '#68683d',
+            'chip_curbookmark_background': '#7c6627',
+            'chip_topic_background': '#25794f',
+            'brace_match_bg': '#50501E',
+            'brace_match_fg': '#F0F0B4',
+            'brace_bad_bg': '#3C1414',
+            'brace_bad_fg': '#FF7878',
+            'chunks_vertical_line': '#9B6AD8', # shelve tool / chunk separator
+            'config_scrollbar': '#4c566a',     # mercurial.ini editor
+            'titlebar_background': '#252526', # Windows 11 title bar
+            'titlebar_text': '#d4d4d4',
 
             # Syntax highlighting
-            'syntax_default': QColor('#A6AA82'),
-            'syntax_keyword': QColor('#8080FF'),
-            'syntax_function': QColor('#80FFFF'),
-            'syntax_class': QColor("#fa7304"),
-            'syntax_number': QColor('#FFB86C'),
-            'syntax_string': QColor('#E98D8D'),
-            'syntax_comment': QColor("#608B4E"),
-            'syntax_operator': QColor("#569CD6"),
-            'syntax_identifier': QColor("#A6AA82"),
+            'syntax_default': '#A6AA82',
+            **_SHARED_SYNTAX,
+            'syntax_identifier': "#A6AA82",
         },
     },
 
@@ -125,77 +133,71 @@ BUILTIN_THEMES = {
         'colors': {
 
             # --- Core UI and text ---
-            'background': QColor('#1F1F1F'), #1F1F1F
-            'backgroundLighter': QColor('#181818'),
-            'text': QColor('#CCCCCC'),
-            'text_disabled': QColor('#DCDCAA'),
-            'text_margin': QColor('#6E7681'),
-            'text_author': QColor('#9D9D9D'),
-            'text_description': QColor('#DCDCAA'),
-            'text_selection': QColor('#CCCCCC'),
-            'selection_background': QColor('#30363D'),
-            'selection_text': QColor('#d4d4d4'),
-            'caret_foreground': QColor('#dcdcdc'),
+            'background': '#1F1F1F', #1F1F1F
+            'backgroundLighter': '#181818',
+            'text': '#CCCCCC',
+            'text_disabled': '#DCDCAA',
+            'text_margin': '#6E7681',
+            'text_author': '#9D9D9D',
+            'text_description': '#DCDCAA',
+            'text_selection': '#CCCCCC',
+            'selection_background': '#30363D',
+            'selection_text': '#d4d4d4',
+            'caret_foreground': '#dcdcdc',
 
             # --- Diff and file status ---
-            'diff_text': QColor('#CCCCCC'),
-            'diff_start': QColor('#BB2BAF'),
-            'diff_removed': QColor("#EB4D44"),
-            'diff_added': QColor('#4EC9B0'),
-            'diff_selected': QColor("#141414"),
-            'diff_excluded': QColor("#222429"),
-            'file_modified': QColor("#9B2691"),
-            'file_resolved': QColor("#30AF50"),
-            'file_added': QColor('#4EC9B0'),
-            'file_removed': QColor("#DA473F"),
-            'file_deleted': QColor("#DA4840"),
-            'file_missing': QColor("#DB4841"),
-            'file_unknown': QColor("#326C8B"),
-            'file_ignored': QColor('#6E7681'),
-            'file_clean': QColor('#CCCCCC'),
+            'diff_text': '#CCCCCC',
+            'diff_start': '#BB2BAF',
+            'diff_removed': "#EB4D44",
+            'diff_added': '#4EC9B0',
+            'diff_selected': "#141414",
+            'diff_excluded': "#222429",
+            'file_modified': "#9B2691",
+            'file_resolved': "#30AF50",
+            'file_added': '#4EC9B0',
+            'file_removed': "#DA473F",
+            'file_deleted': "#DA4840",
+            'file_missing': "#DB4841",
+            'file_unknown': "#326C8B",
+            'file_ignored': '#6E7681',
+            'file_clean': '#CCCCCC',
 
             # --- Controls and UI feedback ---
-            'control_background': QColor('#181818'),
-            'control_hover': QColor('#454545'),
-            'control_pressed': QColor('#666666'),
-            'control_border': QColor('#3c3c3c'),
-            'control_text': QColor('#d4d4d4'),
-            'header_text': QColor('#DCDCAA'),
-            'header_background': QColor('#252526'),
-            'ui_error': QColor('#3C2828'),
-            'ui_warning': QColor('#373723'),
-            'ui_control': QColor('#806464'),
-            'error_text': QColor('#f48771'),
-            'warning_text': QColor('#C23A28'),
-            'success_text': QColor('#9ecb9e'),
-            'success_background': QColor('#2f4f2f'),
+            'control_background': '#181818',
+            'control_hover': '#454545',
+            'control_pressed': '#666666',
+            'control_border': '#3c3c3c',
+            'control_text': '#d4d4d4',
+            'header_text': '#DCDCAA',
+            'header_background': '#252526',
+            'ui_error': '#3C2828',
+            'ui_warning': '#373723',
+            'ui_control': '#806464',
+            'error_text': '#f48771',
+            'warning_text': '#C23A28',
+            'success_text': '#9ecb9e',
+            'success_background': '#2f4f2f',
 
             # --- Special and window elements ---
-            'chip_text': QColor("#dddbdb"),
-            'chip_branch_background': QColor("#3c723c"),
-            'chip_tag_background': QColor("#8a7b29"),
-            'chip_bookmark_background': QColor("#68683d"),
-            'chip_curbookmark_background': QColor("#7c6627"),
-            'chip_topic_background': QColor("#25794f"),
-            'brace_match_bg': QColor('#50501E'),
-            'brace_match_fg': QColor('#F1D70B'),
-            'brace_bad_bg': QColor('#3C1414'),
-            'brace_bad_fg': QColor('#F85149'),
-            'chunks_vertical_line': QColor('#AC7ED7'),
-            'config_scrollbar': QColor('#4c566a'),
-            'titlebar_background': QColor('#252526'),
-            'titlebar_text': QColor('#d4d4d4'),
+            'chip_text': "#dddbdb",
+            'chip_branch_background': "#3c723c",
+            'chip_tag_background': "#8a7b29",
+            'chip_bookmark_background': "#68683d",
+            'chip_curbookmark_background': "#7c6627",
+            'chip_topic_background': "#25794f",
+            'brace_match_bg': '#50501E',
+            'brace_match_fg': '#F1D70B',
+            'brace_bad_bg': '#3C1414',
+            'brace_bad_fg': '#F85149',
+            'chunks_vertical_line': '#AC7ED7',
+            'config_scrollbar': '#4c566a',
+            'titlebar_background': '#252526',
+            'titlebar_text': '#d4d4d4',
 
             # Syntax highlighting
-            'syntax_default': QColor('#CCCCCC'),
-            'syntax_keyword': QColor('#8080FF'),
-            'syntax_function': QColor('#80FFFF'),
-            'syntax_class': QColor("#fa7304"),
-            'syntax_number': QColor('#FFB86C'),
-            'syntax_string': QColor('#E98D8D'),
-            'syntax_comment': QColor("#608B4E"),
-            'syntax_operator': QColor("#569CD6"),
-            'syntax_identifier': QColor("#CCCCCC"),
+            'syntax_default': '#CCCCCC',
+            **_SHARED_SYNTAX,
+            'syntax_identifier': "#CCCCCC",
         },
     },
 
@@ -203,76 +205,70 @@ BUILTIN_THEMES = {
         'colors': {
 
             # --- Core UI and text ---
-            'background': QColor('#282A36'),
-            'backgroundLighter': QColor('#343746'),
-            'text': QColor('#F8F8F2'),
-            'text_disabled': QColor('#6272A4'),
-            'text_margin': QColor('#6272A4'),
-            'text_author': QColor('#6272A4'),
-            'text_description': QColor('#F8F8F2'),
-            'text_selection': QColor('#F8F8F2'),
-            'selection_background': QColor('#44475A'),
-            'selection_text': QColor('#F8F8F2'),
-            'caret_foreground': QColor('#F8F8F2'),
+            'background': '#282A36',
+            'backgroundLighter': '#343746',
+            'text': '#F8F8F2',
+            'text_disabled': '#6272A4',
+            'text_margin': '#6272A4',
+            'text_author': '#6272A4',
+            'text_description': '#F8F8F2',
+            'text_selection': '#F8F8F2',
+            'selection_background': '#44475A',
+            'selection_text': '#F8F8F2',
+            'caret_foreground': '#F8F8F2',
 
             # --- Diff and file status ---
-            'diff_text': QColor('#F8F8F2'),
-            'diff_start': QColor('#BD93F9'),
-            'diff_added': QColor('#50FA7B'),
-            'diff_removed': QColor('#FF5555'),
-            'diff_selected': QColor("#212127"),
-            'diff_excluded': QColor('#242424'),
-            'file_modified': QColor("#A174E0"),
-            'file_added': QColor("#298540"),
-            'file_resolved': QColor("#30AF50"),
-            'file_removed': QColor("#D84747"),
-            'file_deleted': QColor("#D14747"),
-            'file_missing': QColor("#D34545"),
-            'file_unknown': QColor("#8F93A1"),
-            'file_ignored': QColor('#6272A4'),
-            'file_clean': QColor('#F8F8F2'),
+            'diff_text': '#F8F8F2',
+            'diff_start': '#BD93F9',
+            'diff_added': '#50FA7B',
+            'diff_removed': '#FF5555',
+            'diff_selected': "#212127",
+            'diff_excluded': '#242424',
+            'file_modified': "#A174E0",
+            'file_added': "#298540",
+            'file_resolved': "#30AF50",
+            'file_removed': "#D84747",
+            'file_deleted': "#D14747",
+            'file_missing': "#D34545",
+            'file_unknown': "#8F93A1",
+            'file_ignored': '#6272A4',
+            'file_clean': '#F8F8F2',
 
             # --- Controls and UI feedback ---
-            'control_background': QColor('#343746'),
-            'control_hover': QColor('#44475A'),
-            'control_pressed': QColor('#6272A4'),
-            'control_border': QColor("#545977"),
-            'control_text': QColor('#F8F8F2'),
-            'header_background': QColor('#343746'),
-            'header_text': QColor('#F8F8F2'),
-            'ui_error': QColor('#3C2828'),
-            'ui_warning': QColor('#373723'),
-            'ui_control': QColor('#806464'),
-            'error_text': QColor('#FF5555'),
-            'warning_text': QColor('#FFB86C'),
-            'success_text': QColor('#50FA7B'),
-            'success_background': QColor('#2f4f2f'),
+            'control_background': '#343746',
+            'control_hover': '#44475A',
+            'control_pressed': '#6272A4',
+            'control_border': "#545977",
+            'control_text': '#F8F8F2',
+            'header_background': '#343746',
+            'header_text': '#F8F8F2',
+            'ui_error': '#3C2828',
+            'ui_warning': '#373723',
+            'ui_control': '#806464',
+            'error_text': '#FF5555',
+            'warning_text': '#FFB86C',
+            'success_text': '#50FA7B',
+            'success_background': '#2f4f2f',
 
             # --- Special and window elements ---
-            'chip_text': QColor('#E6E6D8'),
-            'chip_tag_background': QColor("#9C7521"),
-            'chip_bookmark_background': QColor('#50FA7B'),
-            'chip_curbookmark_background': QColor('#BD93F9'),
-            'chip_topic_background': QColor('#8BE9FD'),
-            'brace_match_bg': QColor('#44475A'),
-            'brace_match_fg': QColor('#F1FA8C'),
-            'brace_bad_bg': QColor('#3C1414'),
-            'brace_bad_fg': QColor('#FF5555'),
-            'chunks_vertical_line': QColor('#6272A4'),
-            'config_scrollbar': QColor('#4c566a'),
-            'titlebar_background': QColor('#282A36'),
-            'titlebar_text': QColor('#F8F8F2'),
+            'chip_text': '#E6E6D8',
+            'chip_tag_background': "#9C7521",
+            'chip_bookmark_background': '#50FA7B',
+            'chip_curbookmark_background': '#BD93F9',
+            'chip_topic_background': '#8BE9FD',
+            'brace_match_bg': '#44475A',
+            'brace_match_fg': '#F1FA8C',
+            'brace_bad_bg': '#3C1414',
+            'brace_bad_fg': '#FF5555',
+            'chunks_vertical_line': '#6272A4',
+            'config_scrollbar': '#4c566a',
+            'titlebar_background': '#282A36',
+            'titlebar_text': '#F8F8F2',
 
             # Syntax highlighting
-            'syntax_default': QColor('#F8F8F2'),
-            'syntax_keyword': QColor('#8080FF'),
-            'syntax_function': QColor('#80FFFF'),
-            'syntax_class': QColor("#fa7304"),
-            'syntax_number': QColor('#FFB86C'),
-            'syntax_string': QColor('#E98D8D'),
-            'syntax_comment': QColor("#608B4E"),
-            'syntax_operator': QColor("#569CD6"),
-            'syntax_identifier': QColor("#F8F8F2"),
+            'syntax_default': '#F8F8F2',
+            **_SHARED_SYNTAX,
+            'syntax_identifier': "#F8F8F2",
         },
     },
 
@@ -280,77 +276,71 @@ BUILTIN_THEMES = {
         'colors': {
 
             # --- Core UI and text ---
-            'background': QColor("#282E38"),
-            'backgroundLighter': QColor("#323846"),
-            'text': QColor('#D8DEE9'),
-            'text_disabled': QColor('#616E88'),
-            'text_margin': QColor("#6E81A7"),
-            'text_author': QColor("#6B7994"),
-            'text_description': QColor('#D8DEE9'),
-            'text_selection': QColor('#D8DEE9'),
-            'selection_background': QColor('#434C5E'),
-            'selection_text': QColor('#ECEFF4'),
-            'caret_foreground': QColor('#ECEFF4'),
+            'background': "#282E38",
+            'backgroundLighter': "#323846",
+            'text': '#D8DEE9',
+            'text_disabled': '#616E88',
+            'text_margin': "#6E81A7",
+            'text_author': "#6B7994",
+            'text_description': '#D8DEE9',
+            'text_selection': '#D8DEE9',
+            'selection_background': '#434C5E',
+            'selection_text': '#ECEFF4',
+            'caret_foreground': '#ECEFF4',
 
             # --- Diff and file status ---
-            'diff_text': QColor('#D8DEE9'),
-            'diff_start': QColor('#9FE3F2'),
-            'diff_added': QColor("#68DA77"),
-            'diff_removed': QColor("#E75151"),
-            'diff_selected': QColor("#212127"),
-            'diff_excluded': QColor('#242424'),
-            'file_modified': QColor('#6C8FB3'),
-            'file_resolved': QColor("#30AF50"),
-            'file_added': QColor("#87D6C8"),
-            'file_removed': QColor('#F07A82'),
-            'file_deleted': QColor('#F07A82'),
-            'file_missing': QColor('#F1D38A'),
-            'file_unknown': QColor("#80909E"),
-            'file_ignored': QColor('#4C566A'),
-            'file_clean': QColor('#D8DEE9'),
+            'diff_text': '#D8DEE9',
+            'diff_start': '#9FE3F2',
+            'diff_added': "#68DA77",
+            'diff_removed': "#E75151",
+            'diff_selected': "#212127",
+            'diff_excluded': '#242424',
+            'file_modified': '#6C8FB3',
+            'file_resolved': "#30AF50",
+            'file_added': "#87D6C8",
+            'file_removed': '#F07A82',
+            'file_deleted': '#F07A82',
+            'file_missing': '#F1D38A',
+            'file_unknown': "#80909E",
+            'file_ignored': '#4C566A',
+            'file_clean': '#D8DEE9',
 
             # --- Controls and UI feedback ---
-            'control_background': QColor('#3B4252'),
-            'control_hover': QColor('#4C566A'),
-            'control_pressed': QColor('#5E81AC'),
-            'control_border': QColor("#536079"),
-            'control_text': QColor('#ECEFF4'),
-            'header_background': QColor('#3B4252'),
-            'header_text': QColor('#ECEFF4'),
-            'ui_error': QColor('#3C2828'),
-            'ui_warning': QColor('#373723'),
-            'ui_control': QColor('#806464'),
-            'error_text': QColor('#F07A82'),
-            'warning_text': QColor('#F1D38A'),
-            'success_text': QColor('#9ADBCF'),
-            'success_background': QColor('#2f4f2f'),
+            'control_background': '#3B4252',
+            'control_hover': '#4C566A',
+            'control_pressed': '#5E81AC',
+            'control_border': "#536079",
+            'control_text': '#ECEFF4',
+            'header_background': '#3B4252',
+            'header_text': '#ECEFF4',
+            'ui_error': '#3C2828',
+            'ui_warning': '#373723',
+            'ui_control': '#806464',
+            'error_text': '#F07A82',
+            'warning_text': '#F1D38A',
+            'success_text': '#9ADBCF',
+            'success_background': '#2f4f2f',
 
             # --- Special and window elements ---
-            'chip_text': QColor("#BACDE7"),
-            'chip_branch_background': QColor("#415080"),
-            'chip_tag_background': QColor("#386072"),
-            'chip_bookmark_background': QColor('#9ADBCF'),
-            'chip_curbookmark_background': QColor('#9FE3F2'),
-            'chip_topic_background': QColor('#C39BD3'),
-            'brace_match_bg': QColor('#434C5E'),
-            'brace_match_fg': QColor('#F1D38A'),
-            'brace_bad_bg': QColor('#3C1414'),
-            'brace_bad_fg': QColor('#F07A82'),
-            'chunks_vertical_line': QColor('#7B88A1'),
-            'config_scrollbar': QColor('#4c566a'),
-            'titlebar_background': QColor('#2E3440'),
-            'titlebar_text': QColor('#ECEFF4'),
+            'chip_text': "#BACDE7",
+            'chip_branch_background': "#415080",
+            'chip_tag_background': "#386072",
+            'chip_bookmark_background': '#9ADBCF',
+            'chip_curbookmark_background': '#9FE3F2',
+            'chip_topic_background': '#C39BD3',
+            'brace_match_bg': '#434C5E',
+            'brace_match_fg': '#F1D38A',
+            'brace_bad_bg': '#3C1414',
+            'brace_bad_fg': '#F07A82',
+            'chunks_vertical_line': '#7B88A1',
+            'config_scrollbar': '#4c566a',
+            'titlebar_background': '#2E3440',
+            'titlebar_text': '#ECEFF4',
 
             # Syntax highlighting
-            'syntax_default': QColor('#D8DEE9'),
-            'syntax_keyword': QColor('#8080FF'),
-            'syntax_function': QColor('#80FFFF'),
-            'syntax_class': QColor("#fa7304"),
-            'syntax_number': QColor('#FFB86C'),
-            'syntax_string': QColor('#E98D8D'),
-            'syntax_comment': QColor("#608B4E"),
-            'syntax_operator': QColor("#569CD6"),
-            'syntax_identifier': QColor("#D8DEE9"),
+            'syntax_default': '#D8DEE9',
+            **_SHARED_SYNTAX,
+            'syntax_identifier': "#D8DEE9",
         },
     },
 
@@ -358,77 +348,71 @@ BUILTIN_THEMES = {
         'colors': {
 
             # --- Core UI and text ---
-            'background': QColor('#282828'),
-            'backgroundLighter': QColor('#32302F'),
-            'text': QColor("#D1C197"),
-            'text_disabled': QColor('#7C6F64'),
-            'text_margin': QColor('#928374'),
-            'text_author': QColor('#928374'),
-            'text_description': QColor('#EBDBB2'),
-            'text_selection': QColor('#EBDBB2'),
-            'selection_background': QColor('#3C3836'),
-            'selection_text': QColor('#EBDBB2'),
-            'caret_foreground': QColor('#EBDBB2'),
+            'background': '#282828',
+            'backgroundLighter': '#32302F',
+            'text': "#D1C197",
+            'text_disabled': '#7C6F64',
+            'text_margin': '#928374',
+            'text_author': '#928374',
+            'text_description': '#EBDBB2',
+            'text_selection': '#EBDBB2',
+            'selection_background': '#3C3836',
+            'selection_text': '#EBDBB2',
+            'caret_foreground': '#EBDBB2',
 
             # --- Diff and file status ---
-            'diff_text': QColor('#EBDBB2'),
-            'diff_start': QColor('#F2B2C2'),
-            'diff_added': QColor("#BADA1D"),
-            'diff_removed': QColor("#DF3E21"),
-            'diff_selected': QColor("#141414"),
-            'diff_excluded': QColor("#1E1E1E"),
-            'file_modified': QColor("#5C9281"),
-            'file_resolved': QColor("#30AF50"),
-            'file_added': QColor('#C4E03A'),
-            'file_removed': QColor("#CF584A"),
-            'file_deleted': QColor("#BD5246"),
-            'file_missing': QColor('#FABD2F'),
-            'file_unknown': QColor("#7B8370"),
-            'file_ignored': QColor('#928374'),
-            'file_clean': QColor('#EBDBB2'),
+            'diff_text': '#EBDBB2',
+            'diff_start': '#F2B2C2',
+            'diff_added': "#BADA1D",
+            'diff_removed': "#DF3E21",
+            'diff_selected': "#141414",
+            'diff_excluded': "#1E1E1E",
+            'file_modified': "#5C9281",
+            'file_resolved': "#30AF50",
+            'file_added': '#C4E03A',
+            'file_removed': "#CF584A",
+            'file_deleted': "#BD5246",
+            'file_missing': '#FABD2F',
+            'file_unknown': "#7B8370",
+            'file_ignored': '#928374',
+            'file_clean': '#EBDBB2',
 
             # --- Controls and UI feedback ---
-            'control_background': QColor('#32302F'),
-            'control_hover': QColor('#3C3836'),
-            'control_pressed': QColor("#8B6D5D"),
-            'control_border': QColor('#504945'),
-            'control_text': QColor('#EBDBB2'),
-            'header_background': QColor('#32302F'),
-            'header_text': QColor('#EBDBB2'),
-            'ui_error': QColor('#3C2828'),
-            'ui_warning': QColor('#373723'),
-            'ui_control': QColor('#806464'),
-            'error_text': QColor('#FB4934'),
-            'warning_text': QColor('#FABD2F'),
-            'success_text': QColor('#B8BB26'),
-            'success_background': QColor('#2f4f2f'),
+            'control_background': '#32302F',
+            'control_hover': '#3C3836',
+            'control_pressed': "#8B6D5D",
+            'control_border': '#504945',
+            'control_text': '#EBDBB2',
+            'header_background': '#32302F',
+            'header_text': '#EBDBB2',
+            'ui_error': '#3C2828',
+            'ui_warning': '#373723',
+            'ui_control': '#806464',
+            'error_text': '#FB4934',
+            'warning_text': '#FABD2F',
+            'success_text': '#B8BB26',
+            'success_background': '#2f4f2f',
 
             # --- Special and window elements ---
-            'chip_text': QColor('#EBDBB2'),
-            'chip_branch_background': QColor('#665C30'),
-            'chip_tag_background': QColor("#B19038"),
-            'chip_bookmark_background': QColor('#B8BB26'),
-            'chip_curbookmark_background': QColor('#D3869B'),
-            'chip_topic_background': QColor('#8EC07C'),
-            'brace_match_bg': QColor('#3C3836'),
-            'brace_match_fg': QColor('#FABD2F'),
-            'brace_bad_bg': QColor('#3C1414'),
-            'brace_bad_fg': QColor('#FB4934'),
-            'chunks_vertical_line': QColor('#BDAE93'),
-            'config_scrollbar': QColor('#4c566a'),
-            'titlebar_background': QColor('#282828'),
-            'titlebar_text': QColor('#EBDBB2'),
+            'chip_text': '#EBDBB2',
+            'chip_branch_background': '#665C30',
+            'chip_tag_background': "#B19038",
+            'chip_bookmark_background': '#B8BB26',
+            'chip_curbookmark_background': '#D3869B',
+            'chip_topic_background': '#8EC07C',
+            'brace_match_bg': '#3C3836',
+            'brace_match_fg': '#FABD2F',
+            'brace_bad_bg': '#3C1414',
+            'brace_bad_fg': '#FB4934',
+            'chunks_vertical_line': '#BDAE93',
+            'config_scrollbar': '#4c566a',
+            'titlebar_background': '#282828',
+            'titlebar_text': '#EBDBB2',
 
             # Syntax highlighting
-            'syntax_default': QColor('#EBDBB2'),
-            'syntax_keyword': QColor('#8080FF'),
-            'syntax_function': QColor('#80FFFF'),
-            'syntax_class': QColor("#fa7304"),
-            'syntax_number': QColor('#FFB86C'),
-            'syntax_string': QColor('#E98D8D'),
-            'syntax_comment': QColor("#608B4E"),
-            'syntax_operator': QColor("#569CD6"),
-            'syntax_identifier': QColor("#EBDBB2"),
+            'syntax_default': '#EBDBB2',
+            **_SHARED_SYNTAX,
+            'syntax_identifier': "#EBDBB2",
         },
     },
 
@@ -436,77 +420,71 @@ BUILTIN_THEMES = {
         'colors': {
 
             # --- Core UI and text ---
-            'background': QColor("#242529"),
-            'backgroundLighter': QColor("#323641"),
-            'text': QColor("#B5C3DF"),
-            'text_disabled': QColor('#5C6370'),
-            'text_margin': QColor("#5E6C86"),
-            'text_author': QColor("#717F9C"),
-            'text_description': QColor('#ABB2BF'),
-            'text_selection': QColor('#ABB2BF'),
-            'selection_background': QColor('#3E4451'),
-            'selection_text': QColor('#ABB2BF'),
-            'caret_foreground': QColor('#ABB2BF'),
+            'background': "#242529",
+            'backgroundLighter': "#323641",
+            'text': "#B5C3DF",
+            'text_disabled': '#5C6370',
+            'text_margin': "#5E6C86",
+            'text_author': "#717F9C",
+            'text_description': '#ABB2BF',
+            'text_selection': '#ABB2BF',
+            'selection_background': '#3E4451',
+            'selection_text': '#ABB2BF',
+            'caret_foreground': '#ABB2BF',
 
             # --- Diff and file status ---
-            'diff_text': QColor('#ABB2BF'),
-            'diff_start': QColor('#C678DD'),
-            'diff_added': QColor("#46D369"),
-            'diff_removed': QColor("#E04C4C"),
-            'diff_selected': QColor("#141416"),
-            'diff_excluded': QColor('#242424'),
-            'file_modified': QColor("#736EC0"),
-            'file_resolved': QColor("#30AF50"),
-            'file_added': QColor('#98C379'),
-            'file_removed': QColor('#E06C75'),
-            'file_deleted': QColor('#E06C75'),
-            'file_missing': QColor('#F1D38A'),
-            'file_unknown': QColor("#5F748A"),
-            'file_ignored': QColor('#5C6370'),
-            'file_clean': QColor('#ABB2BF'),
+            'diff_text': '#ABB2BF',
+            'diff_start': '#C678DD',
+            'diff_added': "#46D369",
+            'diff_removed': "#E04C4C",
+            'diff_selected': "#141416",
+            'diff_excluded': '#242424',
+            'file_modified': "#736EC0",
+            'file_resolved': "#30AF50",
+            'file_added': '#98C379',
+            'file_removed': '#E06C75',
+            'file_deleted': '#E06C75',
+            'file_missing': '#F1D38A',
+            'file_unknown': "#5F748A",
+            'file_ignored': '#5C6370',
+            'file_clean': '#ABB2BF',
 
             # --- Controls and UI feedback ---
-            'control_background': QColor('#2C313C'),
-            'control_hover': QColor("#4B5569"),
-            'control_pressed': QColor("#465677"),
-            'control_border': QColor("#444D61"),
-            'control_text': QColor('#ABB2BF'),
-            'header_background': QColor('#2C313C'),
-            'header_text': QColor('#ABB2BF'),
-            'ui_error': QColor('#3C2828'),
-            'ui_warning': QColor('#373723'),
-            'ui_control': QColor('#806464'),
-            'error_text': QColor('#E06C75'),
-            'warning_text': QColor('#D19A66'),
-            'success_text': QColor('#98C379'),
-            'success_background': QColor('#2f4f2f'),
+            'control_background': '#2C313C',
+            'control_hover': "#4B5569",
+            'control_pressed': "#465677",
+            'control_border': "#444D61",
+            'control_text': '#ABB2BF',
+            'header_background': '#2C313C',
+            'header_text': '#ABB2BF',
+            'ui_error': '#3C2828',
+            'ui_warning': '#373723',
+            'ui_control': '#806464',
+            'error_text': '#E06C75',
+            'warning_text': '#D19A66',
+            'success_text': '#98C379',
+            'success_background': '#2f4f2f',
 
             # --- Special and window elements ---
-            'chip_text': QColor('#E5E9F0'),
-            'chip_branch_background': QColor("#45467E"),
-            'chip_tag_background': QColor("#50799B"),
-            'chip_bookmark_background': QColor('#98C379'),
-            'chip_curbookmark_background': QColor('#C678DD'),
-            'chip_topic_background': QColor('#56B6C2'),
-            'brace_match_bg': QColor('#3E4451'),
-            'brace_match_fg': QColor('#E5C07B'),
-            'brace_bad_bg': QColor('#3C1414'),
-            'brace_bad_fg': QColor('#E06C75'),
-            'chunks_vertical_line': QColor('#5C6370'),
-            'config_scrollbar': QColor('#4c566a'),
-            'titlebar_background': QColor('#282C34'),
-            'titlebar_text': QColor('#ABB2BF'),
+            'chip_text': '#E5E9F0',
+            'chip_branch_background': "#45467E",
+            'chip_tag_background': "#50799B",
+            'chip_bookmark_background': '#98C379',
+            'chip_curbookmark_background': '#C678DD',
+            'chip_topic_background': '#56B6C2',
+            'brace_match_bg': '#3E4451',
+            'brace_match_fg': '#E5C07B',
+            'brace_bad_bg': '#3C1414',
+            'brace_bad_fg': '#E06C75',
+            'chunks_vertical_line': '#5C6370',
+            'config_scrollbar': '#4c566a',
+            'titlebar_background': '#282C34',
+            'titlebar_text': '#ABB2BF',
 
             # Syntax highlighting
-            'syntax_default': QColor('#ABB2BF'),
-            'syntax_keyword': QColor('#8080FF'),
-            'syntax_function': QColor('#80FFFF'),
-            'syntax_class': QColor("#fa7304"),
-            'syntax_number': QColor('#FFB86C'),
-            'syntax_string': QColor('#E98D8D'),
-            'syntax_comment': QColor("#608B4E"),
-            'syntax_operator': QColor("#569CD6"),
-            'syntax_identifier': QColor("#ABB2BF"),
+            'syntax_default': '#ABB2BF',
+            **_SHARED_SYNTAX,
+            'syntax_identifier': "#ABB2BF",
         },
     },
 }
@@ -519,7 +497,15 @@ THEME_KEYS = tuple(
     next(iter(BUILTIN_THEMES.values()))['colors'].keys()
 )
 
-_THEME_NAME_RE = re.compile(r'^[a-zA-Z0-9_]+$')
+_THEME_KEYS_SET = frozenset(THEME_KEYS)
+
+# [theme.<name>] section, names of at least two characters
+_THEME_SECTION_RE = re.compile(r'^theme\.([a-zA-Z0-9_]{2,})$')
+
+# #rrggbb or rgb(r, g, b), matched against the stripped, lowercased value
+_COLOR_RE = re.compile(
+    r'#([0-9a-f]{6})'
+    r'|rgb\(\s*([0-9]{1,3})\s*,\s*([0-9]{1,3})\s*,\s*([0-9]{1,3})\s*\)')
 
 
 # ----------------------------------------------------------------------
@@ -535,50 +521,70 @@ class ThemeColors:
     def __init__(self, enabled: bool = False):
         self.enabled = enabled
 
-        for key in THEME_KEYS:
-            setattr(self, key, None)
+    def __getattr__(self, name):
+        # Color slots are only assigned by load_theme_colors(); unset ones
+        # (a disabled theme) read as None
+        if name in _THEME_KEYS_SET:
+            return None
+        raise AttributeError(name)
 
 
 # ----------------------------------------------------------------------
 # Color parsing (no alpha support)
 # ----------------------------------------------------------------------
 
-def _parse_color(value: str) -> Optional[QColor]:
+
+# Parsed as plain (r, g, b) tuples so the cache never hands out a shared,
+# mutable QColor. Themes often repeat a value across several keys.
+@functools.lru_cache(maxsize=None)
+def _parse_rgb(value: str) -> Optional[Tuple[int, int, int]]:
     if not value:
         return None
 
-    v = value.strip().lower()
-
-    # Hex: #RRGGBB only
-    if v.startswith('#'):
-        if len(v) != 7:
-            return None
-        c = QColor(v)
-        return c if c.isValid() else None
-
-    # rgb(r, g, b)
-    if v.startswith('rgb(') and v.endswith(')'):
-        try:
-            parts = [int(x.strip()) for x in v[4:-1].split(',')]
-        except ValueError:
-            return None
+    m = _COLOR_RE.fullmatch(value.strip().lower())
+    if m is None:
+        return None
 
-        if len(parts) != 3:
-            return None
+    # Hex: #RRGGBB only, decoded directly instead of by Qt's name lookup
+    digits = m.group(1)
+    if digits:
+        rgb = int(digits, 16)
+        return (rgb >> 16, (rgb >> 8) & 0xff, rgb & 0xff)
 
-        if not all(0 <= x <= 255 for x in parts):
-            return None
+    # rgb(r, g, b); the regex rules out negative values
+    r, g, b = int(m.group(2)), int(m.group(3)), int(m.group(4))
+    if (r | g | b) > 255:
+        return None
+    return (r, g, b)
 
-        return QColor(*parts)
 
-    return None
+def _parse_color(value: str) -> Optional[QColor]:
+    rgb = _parse_rgb(value)
+    if rgb is None:
+        return None
+    return QColor(*rgb)
 
 
 # ----------------------------------------------------------------------
 # Public helpers
 # ----------------------------------------------------------------------
 
+_AVAILABLE_THEMES = None
+
 def available_themes():
+    global _AVAILABLE_THEMES
+    if _AVAILABLE_THEMES is None:
+        _AVAILABLE_THEMES = _find_themes()
+    return list(_AVAILABLE_THEMES)
+
+
+def invalidate_available_themes():
+    """Forget the cached theme list after the config files changed"""
+    global _AVAILABLE_THEMES
+    _AVAILABLE_THEMES = None
+
+
+def _find_themes():
     themes = set(BUILTIN_THEMES.keys())
 
     # Scan mercurial config (mercurial.ini / .hgrc) for [theme.*] sections
@@ -586,18 +592,9 @@ def available_themes():
         ui = hglib.loadui()
         for section in ui._ucfg.sections():
             s = pycompat.sysstr(section) if isinstance(section, bytes) else section
-            if not s.startswith('theme.'):
-                continue
-
-            name = s[6:]
-
-            if len(name) < 2:
-                continue
-
-            if not _THEME_NAME_RE.match(name):
-                continue
-
-            themes.add(name)
+            m = _THEME_SECTION_RE.match(s)
+            if m:
+                themes.add(m.group(1))
     except Exception:
         pass
 
@@ -640,27 +637,32 @@ def load_theme_colors() -> ThemeColors:
 
     theme = ThemeColors(enabled=True)
 
-    # Start with full dark palette
-    colors = base['colors'].copy()
-
-    # Overlay selected theme colors (partial allowed)
-    if overlay:
-        colors.update(overlay.get('colors', {}))
-
     # Load overrides from .ini (use actual section name from config)
+    overrides = {}
     if ini_section is not None:
         for k, v in (ui.configitems(ini_section) or []):
             key = pycompat.sysstr(k)
-            val = pycompat.sysstr(v)
 
-            if key not in THEME_KEYS:
+            if key not in _THEME_KEYS_SET:
                 continue
 
-            color = _parse_color(val)
+            color = _parse_color(pycompat.sysstr(v))
             if color:
-                colors[key] = color
-
-    for key, color in colors.items():
+                overrides[key] = color
+
+    # Resolve each key once: .ini override, then the selected theme colors
+    # (partial allowed), then the full dark palette. Keys sharing a built-in
+    # value share one QColor; theme colors are never modified in place.
+    basecolors = base['colors']
+    overlaycolors = overlay.get('colors', {}) if overlay else {}
+    pool = {}
+    for key in THEME_KEYS:
+        color = overrides.get(key)
+        if color is None:
+            value = overlaycolors.get(key) or basecolors[key]
+            color = pool.get(value)
+            if color is None:
+                color = pool[value] = QColor(value)
         setattr(theme, key, color)
 
     return theme
@@ -679,5 +681,20 @@ def get_theme() -> ThemeColors:
     return _THEME_INSTANCE
 
 
-# This will be called on module import
-THEME = get_theme()
+class _LazyTheme:
+    """
+    Stand-in for the ThemeColors singleton, loaded on first attribute access.
+
+    The loaded values are copied into the instance dict, so later reads
+    are plain attribute lookups and never reach __getattr__ again.
+    """
+
+    def __getattr__(self, name):
+        theme = get_theme()
+        for key in ('enabled',) + THEME_KEYS:
+            self.__dict__[key] = getattr(theme, key)
+        return getattr(theme, name)
+
+
+# Loading is deferred until the theme is first used
+THEME = _LazyTheme()
@@ -17,6 +17,7 @@ from .qtcore import (
     QAbstractTableModel,
     QModelIndex,
     Qt,
+    pyqtSignal,
     pyqtSlot,
 )
 from .qtgui import (
@@ -61,6 +62,10 @@ _FILE_FILTER = ';;'.join([_('Config files (*.conf *.config *.ini)'),
 
 class WebconfForm(QWidget):
     """Widget to show/edit webconf"""
+
+    # emitted when another webconf is selected or its paths are modified
+    webconfChanged = pyqtSignal()
+
     def __init__(self,
                  parent: Optional[QWidget] = None,
                  webconf: Optional[IniConfig] = None) -> None:
@@ -135,6 +140,10 @@ class WebconfForm(QWidget):
         self._qui.repos_view.setModel(m)
         self._qui.repos_view.selectionModel().currentChanged.connect(
             self._updateform)
+        m.dataChanged.connect(self.webconfChanged)
+        m.rowsInserted.connect(self.webconfChanged)
+        m.rowsRemoved.connect(self.webconfChanged)
+        self.webconfChanged.emit()
 
     def _updateform(self) -> None:
         """Update availability of each widget"""
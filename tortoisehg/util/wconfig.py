@@ -158,7 +158,18 @@ class _wconfig:
 
         if isinstance(data, self.__class__):  # keep log
             self._readfiles.extend(data._readfiles)
-            self._sections.update(data._sections)
+            # wrap our own copies of the sections so that changes made to
+            # either object won't leak into the other. a section may have
+            # been emptied, so don't go through __getitem__, which would
+            # hand out a detached wrapper for it.
+            cfgdata = self._config._data
+            for section, sortdict in data._sections.items():
+                if section not in cfgdata:
+                    continue
+                cfgdata[section] = cfgdata[section].preparewrite()
+                wdict = _wsortdict(cfgdata[section])
+                wdict._log.extend(sortdict._log)
+                self._sections[section] = wdict
         elif data:  # record as changes
             self._logupdates(data)
 